@@ -45,6 +45,8 @@ from game import Directions
 from game import Agent
 from game import Actions
 from game import Grid
+from layout.layout import CorridorGraph
+from layout.layout import MazeDistances
 
 class GoWestAgent(Agent):
     "An agent that goes West until it can't."
@@ -85,6 +87,8 @@ class SearchAgent(Agent):
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        # The algorithm and its heuristics are also kept apart for search.collectStatistics
+        self.searchAlgorithm, self.searchHeuristics = func, {}
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
@@ -100,6 +104,7 @@ class SearchAgent(Agent):
             print('[SearchAgent] using function %s and heuristic %s' % (fn, heuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
             self.searchFunction = lambda x: func(x, heuristic=heur)
+            self.searchHeuristics = {'heuristic': heur}
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -119,7 +124,7 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        self.actions  = runSearch(self, problem) # Find a path
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
@@ -140,6 +145,21 @@ class SearchAgent(Agent):
         else:
             return Directions.STOP
 
+def runSearch(agent, problem):
+    """
+    Runs the search function of a search agent on problem. When
+    search.COLLECT_STATISTICS is set (pacman.py --searchStats) the run is
+    instrumented instead, and its SearchStatistics are printed and kept in
+    agent.searchStatistics.
+    """
+    if not search.COLLECT_STATISTICS:
+        return agent.searchFunction(problem)
+    algorithm = getattr(agent, 'searchAlgorithm', agent.searchFunction)
+    heuristics = getattr(agent, 'searchHeuristics', {})
+    actions, agent.searchStatistics = search.collectStatistics(algorithm, problem, heuristics)
+    print(agent.searchStatistics)
+    return actions
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -160,6 +180,7 @@ class PositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.adjacency = gameState.data.layout.getAdjacency()
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -199,15 +220,9 @@ class PositionSearchProblem(search.SearchProblem):
          cost of expanding to that successor
         """
 
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                nextState = (next_x, next_y)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState))
+                      for nextState, action in self.adjacency.getSuccessors(state)]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -420,8 +435,7 @@ class FoodSearchProblem:
             dx, dy = Actions.directionToVector(direction)
             next_x, next_y = int(x + dx), int(y + dy)
             if not self.walls[next_x][next_y]:
-                nextFood = state[1].copy()
-                nextFood[next_x][next_y] = False
+                nextFood = state[1].copyWith(next_x, next_y, False)
                 successors.append( ( ((next_x, next_y), nextFood), direction, 1) )
         return successors
 
@@ -445,6 +459,91 @@ class AStarFoodSearchAgent(SearchAgent):
         self.searchFunction = lambda prob: search.aStarSearch(prob, foodHeuristic)
         self.searchType = FoodSearchProblem
 
+class BitmaskFoodSearchProblem(FoodSearchProblem):
+    """
+    A FoodSearchProblem with a compact state encoding.
+
+    A search state is a tuple ( cellId, foodMask ) where
+      cellId:   an int, the index of Pacman's position in problem.cells
+      foodMask: an int whose bit i is set while problem.food[i] is uneaten
+
+    Successor generation, the goal test and hashing are O(1) instead of
+    copying, counting and hashing a whole food Grid. Heuristics written for
+    ( pacmanPosition, foodGrid ) states can be used through
+    gridHeuristicAdapter.
+    """
+    def __init__(self, startingGameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        adjacency = startingGameState.data.layout.getAdjacency()
+        self.cells = adjacency.cells
+        self.cellIds = adjacency.cellIds
+        self.food = startingGameState.getFood().asList()
+        foodIds = dict((cell, i) for i, cell in enumerate(self.food))
+        self.foodBits = [1 << foodIds[cell] if cell in foodIds else 0 for cell in self.cells]
+
+        # (successor cell id, action) pairs for every cell, in the same order
+        # as FoodSearchProblem generates them
+        self.neighbors = adjacency.neighbors
+
+        position = startingGameState.getPacmanPosition()
+        self.start = (self.cellIds[position], (1 << len(self.food)) - 1)
+
+    def isGoalState(self, state):
+        return state[1] == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        self._expanded += 1 # DO NOT CHANGE
+        cellId, foodMask = state
+        foodBits = self.foodBits
+        return [((nextId, foodMask & ~foodBits[nextId]), direction, 1)
+                for nextId, direction in self.neighbors[cellId]]
+
+    def getCostOfActions(self, actions):
+        """Returns the cost of a particular sequence of actions.  If those actions
+        include an illegal move, return 999999"""
+        x,y = self.getPosition(self.getStartState())
+        cost = 0
+        for action in actions:
+            # figure out the next state and see whether it's legal
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if self.walls[x][y]:
+                return 999999
+            cost += 1
+        return cost
+
+    def getPosition(self, state):
+        return self.cells[state[0]]
+
+    def getFoodGrid(self, state):
+        "Returns the remaining food of a state as a Grid"
+        foodGrid = Grid(self.walls.width, self.walls.height)
+        foodMask = state[1]
+        for i, (x, y) in enumerate(self.food):
+            if foodMask >> i & 1:
+                foodGrid[x][y] = True
+        return foodGrid
+
+    def toGridState(self, state):
+        "Converts a state into the ( pacmanPosition, foodGrid ) form of FoodSearchProblem"
+        return (self.getPosition(state), self.getFoodGrid(state))
+
+def gridHeuristicAdapter(heuristic):
+    """
+    Wraps a heuristic for ( pacmanPosition, foodGrid ) states so that it can
+    be used with a BitmaskFoodSearchProblem.
+    """
+    def adaptedHeuristic(state, problem):
+        return heuristic(problem.toGridState(state), problem)
+    return adaptedHeuristic
+
+class AStarBitmaskFoodSearchAgent(SearchAgent):
+    "A SearchAgent for BitmaskFoodSearchProblem using A* and your foodHeuristic"
+    def __init__(self):
+        self.searchFunction = lambda prob: search.aStarSearch(prob, bitmaskFoodHeuristic)
+        self.searchType = BitmaskFoodSearchProblem
+
 def foodHeuristic(state, problem):
     """
     Your heuristic for the FoodSearchProblem goes here.
@@ -474,21 +573,86 @@ def foodHeuristic(state, problem):
     problem.heuristicInfo['wallCount']
 
     ** You code here"**
+
+    The estimate is the maze distance to the nearest remaining food plus the
+    cost of a minimum spanning tree over the remaining food, using true maze
+    distances. Any path that eats all food has to reach some food first and
+    then connect all of it, so this never overestimates. The tree cost only
+    depends on which food is left and is memoized in problem.heuristicInfo
+    keyed by food bitmask. The bits are those of the food in the first grid
+    the heuristic is given, normally that of the start state; food missing
+    from it is left out, which keeps the estimate admissible.
     """
     position, foodGrid = state
-    walls = problem.walls
-
-    foodItems = foodGrid.asList()
-    currentPosition, goalsVisited = state
-    distance = []
-
-    unvisitedGoals = [item for item in foodItems if item not in goalsVisited]
-    for item in unvisitedGoals:
-        distance.append(util.manhattanDistance(currentPosition, item))
-
-    # admissible heuristic - never overestimates the cost to reach the goal
-    # Return the sum of distances to each unvisited food item
-    return sum(distance) if len(distance) else 0
+    if 'mst' not in problem.heuristicInfo:
+        initFoodHeuristicInfo(problem, foodGrid.asList())
+    info = problem.heuristicInfo
+
+    foodMask = 0
+    for i, (x, y) in enumerate(info['food']):
+        if foodGrid[x][y]:
+            foodMask |= 1 << i
+    return mstFoodDistance(position, foodMask, info)
+
+def bitmaskFoodHeuristic(state, problem):
+    "The foodHeuristic for ( cellId, foodMask ) states of a BitmaskFoodSearchProblem"
+    if 'mst' not in problem.heuristicInfo:
+        initFoodHeuristicInfo(problem, problem.food)
+    return mstFoodDistance(problem.getPosition(state), state[1], problem.heuristicInfo)
+
+def initFoodHeuristicInfo(problem, food):
+    """
+    Stores what the food heuristics need in problem.heuristicInfo: the food
+    positions in bit order, their pairwise maze distances and the memo of
+    spanning tree costs. The maze distances are the cached ones of the
+    layout when the problem has its starting game state, else they are
+    computed from problem.walls.
+    """
+    if hasattr(problem, 'startingGameState'):
+        mazeDistances = problem.startingGameState.data.layout.getMazeDistances()
+    else:
+        mazeDistances = MazeDistances(problem.walls)
+    foodCellIds = [mazeDistances.getCellId(item) for item in food]
+    info = problem.heuristicInfo
+    info['food'] = food
+    info['mazeDistances'] = mazeDistances
+    info['foodCellIds'] = foodCellIds
+    info['foodDistances'] = mazeDistances.distances[np.ix_(foodCellIds, foodCellIds)].tolist()
+    info['distancesToFood'] = {} # position -> distance to every food item
+    info['mst'] = {0: 0} # food bitmask -> spanning tree cost
+
+def mstFoodDistance(position, foodMask, info):
+    "Nearest food distance plus the memoized spanning tree cost of foodMask"
+    if foodMask == 0:
+        return 0
+    remaining = [i for i in range(len(info['food'])) if foodMask >> i & 1]
+
+    distancesToFood = info['distancesToFood'].get(position)
+    if distancesToFood is None:
+        row = info['mazeDistances'].getDistancesFrom(position)
+        distancesToFood = row[info['foodCellIds']].tolist()
+        info['distancesToFood'][position] = distancesToFood
+    nearest = min(distancesToFood[i] for i in remaining)
+
+    treeCost = info['mst'].get(foodMask)
+    if treeCost is None:
+        treeCost = minimumSpanningTreeCost(remaining, info['foodDistances'])
+        info['mst'][foodMask] = treeCost
+    return nearest + treeCost
+
+def minimumSpanningTreeCost(nodes, distances):
+    "Prim's algorithm over the given node indices of a full distance matrix"
+    first = distances[nodes[0]]
+    best = dict((node, first[node]) for node in nodes[1:])
+    total = 0
+    while best:
+        node = min(best, key=best.get)
+        total += best.pop(node)
+        row = distances[node]
+        for other in best:
+            if row[other] < best[other]:
+                best[other] = row[other]
+    return total
 
 
 class ClosestDotSearchAgent(SearchAgent):
@@ -522,6 +686,28 @@ class ClosestDotSearchAgent(SearchAgent):
         "*** YOUR CODE HERE ***"
         return search.breadthFirstSearch(problem)
 
+class IncrementalClosestDotSearchAgent(ClosestDotSearchAgent):
+    """
+    A ClosestDotSearchAgent that keeps one search.DStarLite planner per game:
+    after the first segment only the distances around the eaten dots and
+    Pacman's move are repaired. On the search layouts the closest dot is
+    mostly a step or two away, where the breadth first search is cheaper;
+    the planner pays off when the goals are far apart.
+    """
+    def registerInitialState(self, state):
+        # a new planner for every game, the agent and layout are reused by runGames
+        self.planner = None
+        ClosestDotSearchAgent.registerInitialState(self, state)
+
+    def findPathToClosestDot(self, gameState):
+        food = gameState.getFood()
+        if self.planner is None:
+            problem = AnyFoodSearchProblem(gameState)
+            self.planner = search.DStarLite(problem, food.asList(), util.manhattanDistance)
+        self.planner.setStart(gameState.getPacmanPosition())
+        self.planner.setGoals(food.asList())
+        return self.planner.getPlan()
+
 class AnyFoodSearchProblem(PositionSearchProblem):
     """
     A search problem for finding a path to any food.
@@ -544,6 +730,7 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
         # Store info for the PositionSearchProblem (no need to change this)
         self.walls = gameState.getWalls()
+        self.adjacency = gameState.data.layout.getAdjacency()
         self.startState = gameState.getPacmanPosition()
         self.costFn = lambda x: 1
         self._visited, self._visitedlist, self._expanded = {}, [], 0 # DO NOT CHANGE
@@ -557,6 +744,96 @@ class AnyFoodSearchProblem(PositionSearchProblem):
         "*** YOUR CODE HERE ***"
         return self.food[x][y]
 
+class CorridorSearchProblem(search.SearchProblem):
+    """
+    Exposes a position search problem on its CorridorGraph, so that a search
+    only expands junctions, dead ends and the given keyCells instead of every
+    cell of every corridor.
+
+    States are positions, as in the wrapped problem. An action is the tuple
+    of Directions along one corridor and its cost is the sum of the wrapped
+    problem's costFn over the cells entered; expandActions turns a solution
+    back into a plain list of Directions. The goal test and the expansion
+    bookkeeping are delegated to the wrapped problem, so every cell its goal
+    test may accept must be among the keyCells.
+    """
+
+    def __init__(self, problem, keyCells=()):
+        self.problem = problem
+        self.walls = problem.walls
+        self.goal = getattr(problem, 'goal', None)
+        self.startState = problem.getStartState()
+        graph = CorridorGraph(problem.adjacency, [self.startState] + list(keyCells))
+        costFn = problem.costFn
+        self.successors = {}
+        for node in graph.nodes:
+            self.successors[node] = [(endNode, actions, sum(costFn(cell) for cell in cells))
+                                     for endNode, actions, cells in graph.getEdges(node)]
+
+    def getStartState(self):
+        return self.startState
+
+    def isGoalState(self, state):
+        return self.problem.isGoalState(state)
+
+    def getSuccessors(self, state):
+        "Returns a ( nextNode, corridorActions, corridorCost ) triple per corridor"
+        problem = self.problem
+        problem._expanded += 1 # DO NOT CHANGE
+        if state not in problem._visited:
+            problem._visited[state] = True
+            problem._visitedlist.append(state)
+        return self.successors[state]
+
+    def getCostOfActions(self, actions):
+        return self.problem.getCostOfActions(self.expandActions(actions))
+
+    def expandActions(self, actions):
+        "Flattens a list of corridor actions into Directions"
+        if actions == None: return None
+        return [action for corridor in actions for action in corridor]
+
+def corridorKeyCells(problem):
+    "Returns the cells the goal test of a position problem can accept"
+    if hasattr(problem, 'food'):
+        return problem.food.asList()
+    return [problem.goal]
+
+def corridorSearch(problem, searchFunction):
+    "Runs searchFunction on the corridor contraction of a position problem"
+    corridorProblem = CorridorSearchProblem(problem, corridorKeyCells(problem))
+    return corridorProblem.expandActions(searchFunction(corridorProblem))
+
+class CorridorSearchAgent(SearchAgent):
+    """
+    A SearchAgent that searches the corridor contraction of its problem.
+
+    Corridor actions have non-uniform costs, so use a cost-aware search:
+      python pacman.py -l bigMaze -p CorridorSearchAgent -a fn=astar,heuristic=manhattanHeuristic
+    """
+    def __init__(self, fn='uniformCostSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+        SearchAgent.__init__(self, fn, prob, heuristic)
+        searchFunction = self.searchFunction
+        self.searchFunction = lambda problem: corridorSearch(problem, searchFunction)
+        # --searchStats sees the wrapped problem, so it cannot count corridor expansions
+        self.searchAlgorithm, self.searchHeuristics = self.searchFunction, {}
+
+class LandmarkSearchAgent(SearchAgent):
+    """
+    A SearchAgent for the landmark heuristics that chooses how many
+    landmarks of the layout they use, layout.NUM_LANDMARKS by default:
+      python pacman.py -l bigMaze -p LandmarkSearchAgent -a landmarks=8
+    """
+    def __init__(self, fn='aStarSearch', prob='PositionSearchProblem', heuristic='landmarkHeuristic', landmarks=None):
+        SearchAgent.__init__(self, fn, prob, heuristic)
+        searchType = self.searchType
+        numLandmarks = int(landmarks) if landmarks is not None else None
+        def makeProblem(state):
+            problem = searchType(state)
+            problem.numLandmarks = numLandmarks
+            return problem
+        self.searchType = makeProblem
+
 def mazeDistance(point1, point2, gameState):
     """
     Returns the maze distance between any two points, using the search functions
@@ -566,14 +843,87 @@ def mazeDistance(point1, point2, gameState):
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
     This might be a useful helper function for your ApproximateSearchAgent.
+
+    As with the breadth first search this used to run, the distance
+    between points that are not connected is 0.
     """
     x1, y1 = point1
     x2, y2 = point2
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    # distances are precomputed once per layout, see layout.MazeDistances
+    return max(gameState.data.layout.getMazeDistances().getDistance(point1, point2), 0)
+
+def findPaths(gameState, queries):
+    """
+    Answers many point-to-point path queries on one layout.
+
+    gameState is a GameState or a Layout and queries an iterable of
+    ( start, goal ) positions. Queries are grouped by start, and every
+    distinct start gets a single breadth-first search over the layout's
+    shared Adjacency table that stops once all of its goals are found.
+    Results are yielded as ( start, goal, actions ) as soon as each goal is
+    reached, once per query, where actions is the path breadthFirstSearch
+    would return on a PositionSearchProblem, or None if goal is not
+    reachable.
+
+    Example usage: for start, goal, actions in findPaths(gameState, pairs): ...
+    """
+    layout = gameState if hasattr(gameState, 'getAdjacency') else gameState.data.layout
+    adjacency = layout.getAdjacency()
+    cellIds, neighbors = adjacency.cellIds, adjacency.neighbors
+
+    # how many times each goal was asked for, per start
+    goalsByStart = {}
+    for start, goal in queries:
+        goals = goalsByStart.setdefault(start, {})
+        goals[goal] = goals.get(goal, 0) + 1
+
+    for start, goals in goalsByStart.items():
+        found = set()
+        for goal, actions in pathsFrom(start, goals, cellIds, neighbors):
+            found.add(goal)
+            for _ in range(goals[goal]):
+                yield start, goal, list(actions)
+        # whatever is left cannot be reached
+        for goal in goals:
+            if goal not in found:
+                for _ in range(goals[goal]):
+                    yield start, goal, None
+
+def pathsFrom(start, goals, cellIds, neighbors):
+    """
+    One-to-many breadth-first search over an Adjacency table, yielding
+    ( goal, actions ) for each goal in the order they are reached.
+    """
+    if start not in cellIds:
+        return
+    pending = dict((cellIds[goal], goal) for goal in goals if goal in cellIds)
+    startId = cellIds[start]
+    if startId in pending:
+        yield pending.pop(startId), []
+    parents = [None] * len(neighbors) # ( parent id, action ) of every reached cell
+    parents[startId] = (startId, None)
+    queue = util.Queue()
+    queue.push(startId)
+    while pending and not queue.isEmpty():
+        cell = queue.pop()
+        for nextId, action in neighbors[cell]:
+            if parents[nextId] is None:
+                parents[nextId] = (cell, action)
+                queue.push(nextId)
+                if nextId in pending:
+                    yield pending.pop(nextId), extractPath(parents, startId, nextId)
+
+def extractPath(parents, startId, cellId):
+    "Follows ( parent id, action ) links back from cellId to startId"
+    actions = []
+    while cellId != startId:
+        cellId, action = parents[cellId]
+        actions.append(action)
+    actions.reverse()
+    return actions
 
 class BidirectionalSearchAgent(Agent):
     """
@@ -599,6 +949,8 @@ class BidirectionalSearchAgent(Agent):
         if fn not in dir(search):
             raise AttributeError(fn + ' is not a search function in search.py.')
         func = getattr(search, fn)
+        # The algorithm and its heuristics are also kept apart for search.collectStatistics
+        self.searchAlgorithm, self.searchHeuristics = func, {}
         if 'heuristic' not in func.__code__.co_varnames:
             print('[SearchAgent] using function ' + fn)
             self.searchFunction = func
@@ -626,6 +978,7 @@ class BidirectionalSearchAgent(Agent):
             print('[BidirectionalSearchAgent] using function %s, heuristic %s and backwardsHeuristic %s' % (fn, heuristic, backwardsHeuristic))
             # Note: this bit of Python trickery combines the search algorithm and the heuristic
             self.searchFunction = lambda x: func(x, heuristic=heur, backwardsHeuristic=revheur)
+            self.searchHeuristics = {'heuristic': heur, 'backwardsHeuristic': revheur}
 
         # Get the search problem type from the name
         if prob not in globals().keys() or not prob.endswith('Problem'):
@@ -645,7 +998,7 @@ class BidirectionalSearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state) # Makes a new search problem
-        self.actions  = self.searchFunction(problem) # Find a path
+        self.actions  = runSearch(self, problem) # Find a path
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
@@ -686,6 +1039,7 @@ class BidirectionalPositionSearchProblem(search.SearchProblem):
         goal: A position in the gameState
         """
         self.walls = gameState.getWalls()
+        self.adjacency = gameState.data.layout.getAdjacency()
         self.startState = gameState.getPacmanPosition()
         if start != None: self.startState = start
         self.goal = goal
@@ -727,15 +1081,9 @@ class BidirectionalPositionSearchProblem(search.SearchProblem):
          required to get there, and 'stepCost' is the incremental
          cost of expanding to that successor
         """
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                nextState = (next_x, next_y)
-                cost = self.costFn(nextState)
-                successors.append( ( nextState, action, cost) )
+        costFn = self.costFn
+        successors = [(nextState, action, costFn(nextState))
+                      for nextState, action in self.adjacency.getSuccessors(state)]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -758,16 +1106,9 @@ class BidirectionalPositionSearchProblem(search.SearchProblem):
          required to get there, and 'stepCost' is the incremental
          cost of expanding to that successor
         """
-        successors = []
-        for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
-            x,y = state
-            dx, dy = Actions.directionToVector(action)
-            next_x, next_y = int(x + dx), int(y + dy)
-            if not self.walls[next_x][next_y]:
-                nextState = (next_x, next_y)
-                cost = self.costFn(nextState)
-                rev_action = Actions.reverseDirection(action)
-                successors.append( ( nextState, rev_action, cost) )
+        costFn = self.costFn
+        successors = [(nextState, rev_action, costFn(nextState))
+                      for nextState, rev_action in self.adjacency.getBackwardSuccessors(state)]
 
         # Bookkeeping for display purposes
         self._expanded += 1 # DO NOT CHANGE
@@ -1045,4 +1386,20 @@ def manhattanHeuristic(state,problem=None):
 
 def backwardsManhattanHeuristic(state,problem=None):
     dist = util.manhattanDistance(state,problem.getStartState())
-    return dist
\ No newline at end of file
+    return dist
+
+
+def landmarkHeuristic(state,problem=None):
+    """
+    ALT lower bound on the maze distance from state to problem.goal, see
+    layout.Landmarks. problem.numLandmarks, set by LandmarkSearchAgent,
+    changes how many landmarks of the layout are used; more landmarks mean
+    fewer expansions.
+    """
+    landmarks = problem.adjacency.getLandmarks(getattr(problem, 'numLandmarks', None))
+    return landmarks.getLowerBound(state, problem.goal)
+
+def backwardsLandmarkHeuristic(state,problem=None):
+    "ALT lower bound on the maze distance from state back to the start state"
+    landmarks = problem.adjacency.getLandmarks(getattr(problem, 'numLandmarks', None))
+    return landmarks.getLowerBound(state, problem.getStartState())
@@ -15,6 +15,34 @@ from utils.util import *
 import time, os
 import traceback
 import sys
+import random
+from itertools import compress
+
+# Layers of the Zobrist keys, one key per layer and board cell
+FOOD_LAYER = 0
+CAPSULE_LAYER = 1
+# The keys are drawn from a fixed seed so that hashes agree across runs and processes
+ZOBRIST_RANDOM = random.Random(188)
+ZOBRIST_KEYS = []
+
+ZOBRIST_COLUMNS = {} # ( x, height ) -> the FOOD_LAYER keys of column x, see zobristColumn
+
+def zobristKey(x, y, height, layer=FOOD_LAYER):
+    "The random 64 bit key of cell (x, y) of a board of the given height"
+    index = 2 * (x * height + y) + layer
+    while len(ZOBRIST_KEYS) <= index:
+        ZOBRIST_KEYS.append(ZOBRIST_RANDOM.getrandbits(64))
+    return ZOBRIST_KEYS[index]
+
+def zobristColumn(x, height):
+    "The FOOD_LAYER keys of the cells of column x of a board of the given height, in order"
+    column = ZOBRIST_COLUMNS.get((x, height))
+    if column is None:
+        if height:
+            zobristKey(x, height - 1, height) # draws the keys up to the end of the column
+        start = 2 * x * height
+        column = ZOBRIST_COLUMNS[(x, height)] = ZOBRIST_KEYS[start:start + 2 * height:2]
+    return column
 
 #######################
 # Parts worth reading #
@@ -65,7 +93,11 @@ class Configuration:
 
     The convention for positions, like a graph, is that (0,0) is the lower left corner, x increases
     horizontally and y increases vertically.  Therefore, north is the direction of increasing y, or (0,1).
+
+    Configurations are shared between the agent states of successive game
+    states, so a new one is made instead of changing one.
     """
+    __slots__ = ('pos', 'direction')
 
     def __init__(self, pos, direction):
         self.pos = pos
@@ -112,6 +144,7 @@ class AgentState:
     """
     AgentStates hold the state of an agent (configuration, speed, scared, etc).
     """
+    __slots__ = ('start', 'configuration', 'isPacman', 'scaredTimer', 'numCarrying', 'numReturned')
 
     def __init__( self, startConfiguration, isPacman ):
         self.start = startConfiguration
@@ -150,6 +183,34 @@ class AgentState:
     def getDirection(self):
         return self.configuration.getDirection()
 
+class ReadOnlyAgentState:
+    """
+    A view of an AgentState that reads like it but cannot be changed, the
+    kind agents are given in a GameStateData.readOnlyCopy. Its copy is an
+    ordinary AgentState.
+    """
+    __slots__ = ('agentState',)
+
+    def __init__( self, agentState ):
+        object.__setattr__(self, 'agentState', agentState)
+
+    def __getattr__( self, name ):
+        return getattr(self.agentState, name)
+
+    def __setattr__( self, name, value ):
+        raise AttributeError('a read-only AgentState cannot be changed, change a copy instead')
+
+    def __str__( self ):
+        return str(self.agentState)
+
+    def __eq__( self, other ):
+        if isinstance(other, ReadOnlyAgentState):
+            other = other.agentState
+        return self.agentState == other
+
+    def __hash__( self ):
+        return hash(self.agentState)
+
 class Grid:
     """
     A 2-dimensional array of objects backed by a list of lists.  Data is accessed
@@ -157,6 +218,13 @@ class Grid:
     y vertical and the origin (0,0) in the bottom left corner.
 
     The __str__ method constructs an output that is oriented like a pacman board.
+
+    The hash is the Zobrist key of the cells that are set. It is cached,
+    and copyWith derives the key of the copy from it, so the grids of a
+    search that only ever copyWith hash in O(1). The columns are
+    GridColumns, which count the writes of grid[x][y] = value in
+    GridColumn.writes; a cached key is only used while that count has not
+    changed, otherwise it is computed from the cells again.
     """
     def __init__(self, width, height, initialValue=False, bitRepresentation=None):
         if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
@@ -164,7 +232,8 @@ class Grid:
 
         self.width = width
         self.height = height
-        self.data = [[initialValue for y in range(height)] for x in range(width)]
+        self.data = [GridColumn([initialValue] * height) for x in range(width)]
+        self._hash = None # ( key, GridColumn.writes when it was computed )
         if bitRepresentation:
             self._unpackBits(bitRepresentation)
 
@@ -172,7 +241,14 @@ class Grid:
         return self.data[i]
 
     def __setitem__(self, key, item):
-        self.data[key] = item
+        self.data[key] = GridColumn(item)
+        GridColumn.writes += 1
+
+    def __setstate__(self, state):
+        # the write count of another process means nothing
+        self.__dict__.update(state)
+        self.data = [GridColumn(column) for column in self.data]
+        self._hash = None
 
     def __str__(self):
         out = [[str(self.data[x][y])[0] for x in range(self.width)] for y in range(self.height)]
@@ -184,27 +260,63 @@ class Grid:
         return self.data == other.data
 
     def __hash__(self):
-        # return hash(str(self))
-        base = 1
-        h = 0
-        for l in self.data:
-            for i in l:
-                if i:
-                    h += base
-                base *= 2
-        return hash(h)
+        return self.getZobristKey()
+
+    def getZobristKey(self):
+        "The Zobrist key of the cells that are set, before hash() folds it"
+        cached = self._getCachedKey()
+        if cached is not None:
+            return cached
+        key = 0
+        for x, column in enumerate(self.data):
+            for cellKey in compress(zobristColumn(x, self.height), column):
+                key ^= cellKey
+        self._hash = (key, GridColumn.writes)
+        return key
+
+    def _getCachedKey(self):
+        "The cached Zobrist key, None if there is none or a column was written since"
+        if self._hash is not None and self._hash[1] == GridColumn.writes:
+            return self._hash[0]
+        return None
 
     def copy(self):
-        g = Grid(self.width, self.height)
-        g.data = [x[:] for x in self.data]
+        g = self._emptyCopy()
+        g.data = [GridColumn(x) for x in self.data]
+        g._hash = self._hash
         return g
 
     def deepCopy(self):
         return self.copy()
 
     def shallowCopy(self):
-        g = Grid(self.width, self.height)
+        g = self._emptyCopy()
         g.data = self.data
+        g._hash = self._hash
+        return g
+
+    def copyWith(self, x, y, value):
+        """
+        A copy with grid[x][y] set to value. Every other column is shared
+        with this grid, so it costs one column instead of the whole grid,
+        and the hash of the copy is derived from that of this grid.
+        """
+        g = self._emptyCopy()
+        g.data = self.data[:]
+        column = g.data[x] = GridColumn(g.data[x])
+        key = self._getCachedKey()
+        if key is not None:
+            if bool(column[y]) != bool(value):
+                key ^= zobristKey(x, y, self.height)
+            g._hash = (key, GridColumn.writes)
+        list.__setitem__(column, y, value) # a new column, no other grid can have a stale key for it
+        return g
+
+    def _emptyCopy(self):
+        "A grid of the same size without cells, cheaper than filling them in only to replace them"
+        g = Grid(0, 0)
+        g.width = self.width
+        g.height = self.height
         return g
 
     def count(self, item =True ):
@@ -223,18 +335,13 @@ class Grid:
 
         (width, height, bitPackedInts...)
         """
-        bits = [self.width, self.height]
-        currentInt = 0
-        for i in range(self.height * self.width):
-            bit = self.CELLS_PER_INT - (i % self.CELLS_PER_INT) - 1
-            x, y = self._cellIndexToPosition(i)
-            if self[x][y]:
-                currentInt += 2 ** bit
-            if (i + 1) % self.CELLS_PER_INT == 0:
-                bits.append(currentInt)
-                currentInt = 0
-        bits.append(currentInt)
-        return tuple(bits)
+        cells = self.width * self.height
+        return tuple([self.width, self.height] + packBitboard(self.toBitboard(), cells, self.CELLS_PER_INT))
+
+    def toBitboard(self):
+        "The cells as one int, bit x * height + y for cell (x, y)"
+        cells = ''.join(['1' if cell else '0' for column in reversed(self.data) for cell in reversed(column)])
+        return int(cells or '0', 2)
 
     def _cellIndexToPosition(self, index):
         x = index // self.height
@@ -245,25 +352,274 @@ class Grid:
         """
         Fills in data from a bit-level representation
         """
-        cell = 0
-        for packed in bits:
-            for bit in self._unpackInt(packed, self.CELLS_PER_INT):
-                if cell == self.width * self.height: break
-                x, y = self._cellIndexToPosition(cell)
-                self[x][y] = bit
-                cell += 1
-
-    def _unpackInt(self, packed, size):
-        bools = []
-        if packed < 0: raise ValueError("must be a positive integer")
-        for i in range(size):
-            n = 2 ** (self.CELLS_PER_INT - i - 1)
-            if packed >= n:
-                bools.append(True)
-                packed -= n
-            else:
-                bools.append(False)
-        return bools
+        cells = self.width * self.height
+        board = format(unpackBitboard(bits, cells, self.CELLS_PER_INT), '0%db' % cells)[::-1]
+        self.data = [GridColumn([cell == '1' for cell in board[x * self.height:(x + 1) * self.height]]) for x in range(self.width)]
+        self._hash = None
+
+class GridColumn(list):
+    """
+    A column of a Grid, a list that counts the writes to any column in
+    writes, so that grids can tell whether their cached hash is still valid.
+    """
+    __slots__ = ()
+    writes = 0
+
+    def __setitem__(self, index, value):
+        list.__setitem__(self, index, value)
+        GridColumn.writes += 1
+
+class BitGrid:
+    """
+    A Grid backed by a bitboard: one Python int holding bit x * height + y
+    for cell (x, y). It has the same interface as Grid, grid[x][y] goes
+    through a BitGridColumn. The number of set cells is kept up to date on
+    every write, so count is O(1). asList, copies and packBits work on the
+    whole int instead of cell by cell, while reading a single cell is
+    somewhat slower than in a Grid. The hash equals that of a Grid with the
+    same cells and is kept up to date on writes.
+    """
+    def __init__(self, width, height, initialValue=False, bitRepresentation=None):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.CELLS_PER_INT = 30
+
+        self.width = width
+        self.height = height
+        self.bits = (1 << width * height) - 1 if initialValue else 0
+        self._count = width * height if initialValue else 0
+        self._hash = None
+        if bitRepresentation:
+            self.bits = unpackBitboard(bitRepresentation, width * height, self.CELLS_PER_INT)
+            self._count = bin(self.bits).count('1')
+
+    def fromGrid(grid):
+        "A BitGrid with the cells of grid"
+        g = BitGrid(grid.width, grid.height)
+        g.bits = grid.toBitboard()
+        g._count = bin(g.bits).count('1')
+        return g
+    fromGrid = staticmethod(fromGrid)
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.width: raise IndexError('grid index out of range')
+        return BitGridColumn(self, i)
+
+    def __setitem__(self, key, item):
+        for y in range(self.height):
+            self.set(key, y, item[y])
+
+    def set(self, x, y, value):
+        "Sets cell (x, y), updating the count and the hash"
+        bit = 1 << (x * self.height + y)
+        if bool(self.bits & bit) == bool(value): return
+        self.bits ^= bit
+        self._count += 1 if value else -1
+        if self._hash is not None:
+            self._hash ^= zobristKey(x, y, self.height)
+
+    @property
+    def data(self):
+        "The cells as a Grid's list of columns, built on every call"
+        return [list(column) for column in self]
+
+    def __str__(self):
+        board = format(self.bits, '0%db' % (self.width * self.height))[::-1]
+        out = [''.join(['T' if board[x * self.height + y] == '1' else 'F' for x in range(self.width)])
+               for y in range(self.height)]
+        out.reverse()
+        return '\n'.join(out)
+
+    def __eq__(self, other):
+        if other is None: return False
+        if isinstance(other, BitGrid):
+            return self.width == other.width and self.height == other.height and self.bits == other.bits
+        return self.data == other.data
+
+    def __hash__(self):
+        return self.getZobristKey()
+
+    def getZobristKey(self):
+        "The Zobrist key of the cells that are set, before hash() folds it"
+        if self._hash is None:
+            key = 0
+            for x, y in self.asList():
+                key ^= zobristKey(x, y, self.height)
+            self._hash = key
+        return self._hash
+
+    def copy(self):
+        # ints are immutable, so the copy can share them
+        g = BitGrid(0, 0)
+        g.width, g.height = self.width, self.height
+        g.bits, g._count, g._hash = self.bits, self._count, self._hash
+        return g
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def copyWith(self, x, y, value):
+        "A copy with grid[x][y] set to value"
+        g = self.copy()
+        g.set(x, y, value)
+        return g
+
+    def count(self, item =True ):
+        return self._count if item else self.width * self.height - self._count
+
+    def asList(self, key = True):
+        cells = self.width * self.height
+        bits = self.bits if key else ~self.bits & ((1 << cells) - 1)
+        board = bin(bits)[:1:-1] # bit i is character i
+        if 8 * self.count(key) > cells:
+            return [divmod(i, self.height) for i, cell in enumerate(board) if cell == '1']
+        # few cells are set, skip to them
+        positions = []
+        i = board.find('1')
+        while i >= 0:
+            positions.append(divmod(i, self.height))
+            i = board.find('1', i + 1)
+        return positions
+
+    def packBits(self):
+        """
+        Returns an efficient int list representation
+
+        (width, height, bitPackedInts...)
+        """
+        return tuple([self.width, self.height] + packBitboard(self.bits, self.width * self.height, self.CELLS_PER_INT))
+
+    def toBitboard(self):
+        return self.bits
+
+class BitGridColumn:
+    "Column x of a BitGrid, read and written as grid[x][y]"
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        grid = self.grid
+        if not 0 <= y < grid.height: raise IndexError('grid index out of range')
+        return (grid.bits >> (self.x * grid.height + y)) & 1 == 1
+
+    def __setitem__(self, y, value):
+        if not 0 <= y < self.grid.height: raise IndexError('grid index out of range')
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+class ReadOnlyGrid:
+    """
+    A view of a Grid or BitGrid that reads like it, grid[x][y] included,
+    but raises a TypeError on writes. Its copies, copyWith among them, are
+    ordinary grids of the kind it views, and so is the data it returns.
+    """
+    __slots__ = ('grid',)
+
+    def __init__(self, grid):
+        object.__setattr__(self, 'grid', grid)
+
+    def __getattr__(self, name):
+        if name in ('width', 'height', 'CELLS_PER_INT'):
+            return getattr(self.grid, name)
+        raise AttributeError("'ReadOnlyGrid' object has no attribute '%s'" % name)
+
+    def __setattr__(self, name, value):
+        raise TypeError('a ReadOnlyGrid cannot be changed, change a copy instead')
+
+    def __getitem__(self, i):
+        return ReadOnlyGridColumn(self.grid[i])
+
+    def __setitem__(self, key, item):
+        raise TypeError('a ReadOnlyGrid cannot be changed, change a copy instead')
+
+    @property
+    def data(self):
+        return self.grid.copy().data
+
+    def __str__(self):
+        return str(self.grid)
+
+    def __eq__(self, other):
+        if isinstance(other, ReadOnlyGrid):
+            other = other.grid
+        return self.grid == other
+
+    def __hash__(self):
+        return hash(self.grid)
+
+    def getZobristKey(self):
+        return self.grid.getZobristKey()
+
+    def copy(self):
+        return self.grid.copy()
+
+    def deepCopy(self):
+        return self.grid.copy()
+
+    def shallowCopy(self):
+        return self.grid.copy()
+
+    def copyWith(self, x, y, value):
+        return self.grid.copyWith(x, y, value)
+
+    def count(self, item =True ):
+        return self.grid.count(item)
+
+    def asList(self, key = True):
+        return self.grid.asList(key)
+
+    def packBits(self):
+        return self.grid.packBits()
+
+    def toBitboard(self):
+        return self.grid.toBitboard()
+
+class ReadOnlyGridColumn:
+    "Column x of a ReadOnlyGrid"
+    __slots__ = ('column',)
+
+    def __init__(self, column):
+        self.column = column
+
+    def __getitem__(self, y):
+        return self.column[y]
+
+    def __setitem__(self, y, value):
+        raise TypeError('a ReadOnlyGrid cannot be changed, change a copy instead')
+
+    def __len__(self):
+        return len(self.column)
+
+    def __iter__(self):
+        return iter(self.column)
+
+def packBitboard(bits, cells, cellsPerInt):
+    """
+    Splits a bitboard of the given number of cells into the ints of
+    Grid.packBits, cellsPerInt cells per int with the first one in the
+    highest bit.
+    """
+    mask = (1 << cellsPerInt) - 1
+    packed = []
+    for start in range(0, cells // cellsPerInt * cellsPerInt + 1, cellsPerInt):
+        chunk = (bits >> start) & mask
+        packed.append(int(format(chunk, '0%db' % cellsPerInt)[::-1], 2))
+    return packed
+
+def unpackBitboard(packed, cells, cellsPerInt):
+    "The bitboard of the ints of Grid.packBits"
+    bits = 0
+    for i, chunk in enumerate(packed):
+        if chunk < 0: raise ValueError("must be a positive integer")
+        bits |= int(format(chunk, '0%db' % cellsPerInt)[::-1], 2) << (i * cellsPerInt)
+    return bits & ((1 << cells) - 1)
 
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1,2)):
@@ -361,19 +717,39 @@ class Actions:
 
 class GameStateData:
     """
+    A successor shares the food grid, the capsules and the agent states with
+    its predecessor (copy on write): food is replaced through removeFood,
+    and the capsules and agent states are copied by ownCapsules and
+    ownAgentState the first time either state changes them.
 
+    explored is the pacman.ExploredStates of the game the state belongs to,
+    shared by all of its states, or None when the game does not track them.
     """
+    __slots__ = ('food', 'capsules', 'agentStates', 'layout', '_eaten', 'score', 'scoreChange',
+                 '_foodEaten', '_foodAdded', '_capsuleEaten', '_agentMoved', '_lose', '_win',
+                 '_ownedAgents', '_ownCapsules', '_capsuleKey', 'explored')
+
     def __init__( self, prevState = None ):
         """
         Generates a new data packet by copying information from its predecessor.
         """
+        # indices of the agent states copied for this data, None while the list is shared
+        self._ownedAgents = None
+        self._ownCapsules = False
+        self._capsuleKey = None # Zobrist key of the capsules, see getCapsuleKey
+        self.explored = None
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates( prevState.agentStates )
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._capsuleKey = prevState._capsuleKey
+            self.explored = prevState.explored
+            # from now on both have to copy before writing
+            prevState._ownedAgents = None
+            prevState._ownCapsules = False
 
         self._foodEaten = None
         self._foodAdded = None
@@ -384,15 +760,83 @@ class GameStateData:
         self.scoreChange = 0
 
     def deepCopy( self ):
-        state = GameStateData( self )
+        # the layout is static and shared
+        state = self._sharedCopy()
         state.food = self.food.deepCopy()
-        state.layout = self.layout.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates( self.agentStates )
+        state._ownedAgents = set(range(len(state.agentStates)))
+        state._ownCapsules = True
+        return state
+
+    def readOnlyCopy( self ):
+        """
+        A copy that shares the food grid and the layout with this data, so
+        its cost does not depend on the size of the board. The food is
+        wrapped in a ReadOnlyGrid and the agent states are ReadOnlyAgentStates,
+        so a holder that tries to change them gets an error instead of
+        changing the game; the few capsules are copied. Successors of the
+        copy are ordinary states, the rules copy what they change.
+        """
+        state = self._sharedCopy()
+        if not isinstance( self.food, ReadOnlyGrid ):
+            state.food = ReadOnlyGrid( self.food )
+        state.agentStates = [agentState if isinstance( agentState, ReadOnlyAgentState ) else ReadOnlyAgentState( agentState )
+                             for agentState in self.agentStates]
+        state.capsules = self.capsules[:]
+        state._ownCapsules = True
+        return state
+
+    def _sharedCopy( self ):
+        "A copy sharing everything with this data, including what changed in the last move"
+        state = GameStateData( self )
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
         state._foodAdded = self._foodAdded
         state._capsuleEaten = self._capsuleEaten
         return state
 
+    def ownAgentState( self, agentIndex ):
+        "Returns the agent state at agentIndex for changing, copied first if it is shared"
+        if self._ownedAgents is None:
+            self.agentStates = self.agentStates[:]
+            self._ownedAgents = set()
+        if agentIndex not in self._ownedAgents:
+            self.agentStates[agentIndex] = self.agentStates[agentIndex].copy()
+            self._ownedAgents.add(agentIndex)
+        return self.agentStates[agentIndex]
+
+    def ownCapsules( self ):
+        "Returns the capsules for changing, copied first if they are shared"
+        if not self._ownCapsules:
+            self.capsules = self.capsules[:]
+            self._ownCapsules = True
+        return self.capsules
+
+    def removeFood( self, position ):
+        "Removes the food at position; the copy of the grid derives its Zobrist key from the old one"
+        x, y = position
+        self.food = self.food.copyWith( x, y, False )
+
+    def getFoodKey( self ):
+        "The Zobrist key of the food, cached by the grid itself"
+        return self.food.getZobristKey()
+
+    def removeCapsule( self, position ):
+        "Removes the capsule at position and updates the Zobrist key of the capsules"
+        key = self.getCapsuleKey()
+        self.ownCapsules().remove( position )
+        x, y = position
+        self._capsuleKey = key ^ zobristKey( x, y, self.layout.height, CAPSULE_LAYER )
+
+    def getCapsuleKey( self ):
+        "The Zobrist key of the capsules, computed once and then kept up to date by removeCapsule"
+        if self._capsuleKey is None:
+            self._capsuleKey = 0
+            for x, y in self.capsules:
+                self._capsuleKey ^= zobristKey( x, y, self.layout.height, CAPSULE_LAYER )
+        return self._capsuleKey
+
     def copyAgentStates( self, agentStates ):
         copiedStates = []
         for agentState in agentStates:
@@ -413,15 +857,11 @@ class GameStateData:
 
     def __hash__( self ):
         """
-        Allows states to be keys of dictionaries.
+        Allows states to be keys of dictionaries. The Zobrist keys of the
+        food and the capsules are kept up to date as they are eaten, so this
+        does not depend on the size of the board.
         """
-        for i, state in enumerate( self.agentStates ):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                #hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113* hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575 )
+        return hash(tuple(self.agentStates)) ^ self.getFoodKey() ^ self.getCapsuleKey() ^ hash(self.score)
 
     def __str__( self ):
         width, height = self.layout.width, self.layout.height
@@ -494,6 +934,9 @@ class GameStateData:
                 else: numGhosts += 1
             self.agentStates.append( AgentState( Configuration( pos, Directions.STOP), isPacman) )
         self._eaten = [False for a in self.agentStates]
+        self._ownedAgents = set(range(len(self.agentStates)))
+        self._ownCapsules = True
+        self._capsuleKey = None
 
 try:
     import boinc
@@ -506,7 +949,7 @@ class Game:
     The Game manages the control flow, soliciting actions from agents.
     """
 
-    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False ):
+    def __init__( self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False, readOnlyObservations=False ):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -515,6 +958,7 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.readOnlyObservations = readOnlyObservations
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -555,6 +999,16 @@ class Game:
         sys.stderr = OLD_STDERR
 
 
+    def observe(self):
+        """
+        The copy of the game state an agent is given. With
+        readOnlyObservations agents get a readOnlyCopy, which costs the same
+        on any board but raises an error when changed, otherwise a deepCopy.
+        """
+        if self.readOnlyObservations:
+            return self.state.readOnlyCopy()
+        return self.state.deepCopy()
+
     def run(self):
         """
         Main control loop for game play.
@@ -581,7 +1035,7 @@ class Game:
                         timed_func = TimeoutFunction(agent.registerInitialState, int(self.rules.getMaxStartupTime(i)))
                         try:
                             start_time = time.time()
-                            timed_func(self.state.deepCopy())
+                            timed_func(self.observe())
                             time_taken = time.time() - start_time
                             self.totalAgentTimes[i] += time_taken
                         except TimeoutFunctionException:
@@ -595,7 +1049,7 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    agent.registerInitialState(self.state.deepCopy())
+                    agent.registerInitialState(self.observe())
                 ## TODO: could this exceed the total time
                 self.unmute()
 
@@ -615,7 +1069,7 @@ class Game:
                         timed_func = TimeoutFunction(agent.observationFunction, int(self.rules.getMoveTimeout(agentIndex)))
                         try:
                             start_time = time.time()
-                            observation = timed_func(self.state.deepCopy())
+                            observation = timed_func(self.observe())
                         except TimeoutFunctionException:
                             skip_action = True
                         move_time += time.time() - start_time
@@ -625,10 +1079,10 @@ class Game:
                         self.unmute()
                         return
                 else:
-                    observation = agent.observationFunction(self.state.deepCopy())
+                    observation = agent.observationFunction(self.observe())
                 self.unmute()
             else:
-                observation = self.state.deepCopy()
+                observation = self.observe()
 
             # Solicit an action
             action = None
@@ -14,22 +14,40 @@
 
 from utils.util import manhattanDistance
 from game import Grid
+from game import BitGrid
+from game import Directions
 import os
 import random
+import hashlib
+import tempfile
 from functools import reduce
+import numpy as np
 
 VISIBILITY_MATRIX_CACHE = {}
+MAZE_DISTANCES_CACHE = {}
+ADJACENCY_CACHE = {}
+# Directory holding one .npy distance table per layout; None disables it
+MAZE_DISTANCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'distances')
+# Part of every .npy file name; bump it when the stored table changes format
+MAZE_DISTANCES_VERSION = 1
+# Number of landmarks used by the landmark heuristics unless asked otherwise
+NUM_LANDMARKS = 4
 
 class Layout:
     """
     A Layout manages the static information about the game board.
+
+    With bitboard set the food is kept in a game.BitGrid, and so is the food
+    of every game state and food search problem built from the layout. The
+    walls stay a Grid, they are only ever read cell by cell.
     """
 
-    def __init__(self, layoutText):
+    def __init__(self, layoutText, bitboard=False):
         self.width = len(layoutText[0])
         self.height= len(layoutText)
+        self.bitboard = bitboard
         self.walls = Grid(self.width, self.height, False)
-        self.food = Grid(self.width, self.height, False)
+        self.food = (BitGrid if bitboard else Grid)(self.width, self.height, False)
         self.capsules = []
         self.agentPositions = []
         self.numGhosts = 0
@@ -62,6 +80,43 @@ class Layout:
         else:
             self.visibility = VISIBILITY_MATRIX_CACHE[reduce(str.__add__, self.layoutText)]
 
+    def getFingerprint(self):
+        "Returns a hash of the layout text, stable across runs"
+        if not hasattr(self, '_fingerprint'):
+            text = "\n".join(self.layoutText)
+            self._fingerprint = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        return self._fingerprint
+
+    def getMazeDistances(self):
+        """
+        Returns the all-pairs MazeDistances of this layout. The table is built
+        on first use and shared by every layout with the same text, both in
+        this process and, through MAZE_DISTANCES_DIR, across runs.
+        """
+        if not hasattr(self, '_mazeDistances'):
+            key = self.getFingerprint()
+            if key not in MAZE_DISTANCES_CACHE:
+                cacheFile = None
+                if MAZE_DISTANCES_DIR is not None:
+                    fileName = '%s-v%d.npy' % (key, MAZE_DISTANCES_VERSION)
+                    cacheFile = os.path.join(MAZE_DISTANCES_DIR, fileName)
+                MAZE_DISTANCES_CACHE[key] = MazeDistances(self.walls, cacheFile)
+            self._mazeDistances = MAZE_DISTANCES_CACHE[key]
+        return self._mazeDistances
+
+    def getAdjacency(self):
+        "Returns the Adjacency table of this layout, shared by equal layouts"
+        if not hasattr(self, '_adjacency'):
+            key = self.getFingerprint()
+            if key not in ADJACENCY_CACHE:
+                ADJACENCY_CACHE[key] = Adjacency(self.walls)
+            self._adjacency = ADJACENCY_CACHE[key]
+        return self._adjacency
+
+    def getLandmarks(self, k=None):
+        "Returns k Landmarks of this layout, see Adjacency.getLandmarks"
+        return self.getAdjacency().getLandmarks(k)
+
     def isWall(self, pos):
         x, col = pos
         return self.walls[x][col]
@@ -91,7 +146,7 @@ class Layout:
         return "\n".join(self.layoutText)
 
     def deepCopy(self):
-        return Layout(self.layoutText[:])
+        return Layout(self.layoutText[:], self.bitboard)
 
     def processLayoutText(self, layoutText):
         """
@@ -129,22 +184,258 @@ class Layout:
         elif layoutChar in  ['1', '2', '3', '4']:
             self.agentPositions.append( (int(layoutChar), (x,y)))
             self.numGhosts += 1
-def getLayout(name, back = 2):
+
+class Adjacency:
+    """
+    The legal moves out of every open cell of a maze, built once from walls.
+
+    Cells are numbered as in walls.asList(False). The moves of cell i are
+    stored in flat arrays at positions offsets[i] to offsets[i + 1]:
+      neighborIds:  the id of the cell the move leads to
+      actionCodes:  the index of the move's direction in ACTIONS
+      reverseCodes: the index of the opposite direction in ACTIONS
+    Moves are listed in NORTH, SOUTH, EAST, WEST order. getSuccessors and
+    getBackwardSuccessors return the same moves as ready-made
+    ( position, action ) tuples for position based search problems.
+    """
+    ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+    VECTORS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    REVERSE = [1, 0, 3, 2]
+
+    def __init__(self, walls):
+        self.cells = walls.asList(False)
+        self.cellIds = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.offsets = [0]
+        self.neighborIds = []
+        self.actionCodes = []
+        self.reverseCodes = []
+        for x, y in self.cells:
+            for code, (dx, dy) in enumerate(self.VECTORS):
+                nextId = self.cellIds.get((x + dx, y + dy))
+                if nextId is not None:
+                    self.neighborIds.append(nextId)
+                    self.actionCodes.append(code)
+                    self.reverseCodes.append(self.REVERSE[code])
+            self.offsets.append(len(self.neighborIds))
+
+        self.neighbors = []
+        self.successors = {}
+        self.backwardSuccessors = {}
+        for i, cell in enumerate(self.cells):
+            moves = range(self.offsets[i], self.offsets[i + 1])
+            self.neighbors.append(tuple((self.neighborIds[m], self.ACTIONS[self.actionCodes[m]]) for m in moves))
+            self.successors[cell] = tuple((self.cells[nextId], action) for nextId, action in self.neighbors[i])
+            self.backwardSuccessors[cell] = tuple((self.cells[self.neighborIds[m]], self.ACTIONS[self.reverseCodes[m]]) for m in moves)
+        self._landmarks = {}
+
+    def getCellId(self, pos):
+        return self.cellIds[pos]
+
+    def getNeighbors(self, cellId):
+        "Returns ( neighborId, action ) pairs for the moves out of a cell"
+        return self.neighbors[cellId]
+
+    def getSuccessors(self, pos):
+        "Returns ( nextPosition, action ) pairs for the moves out of pos, none if it is not open"
+        return self.successors.get(pos, ())
+
+    def getBackwardSuccessors(self, pos):
+        "Returns ( previousPosition, action ) pairs for the moves into pos, none if it is not open"
+        return self.backwardSuccessors.get(pos, ())
+
+    def getLandmarks(self, k=None):
+        "Returns k Landmarks of this maze (NUM_LANDMARKS by default), built once per k"
+        if k is None: k = NUM_LANDMARKS
+        if k not in self._landmarks:
+            self._landmarks[k] = Landmarks(self, k)
+        return self._landmarks[k]
+
+class Landmarks:
+    """
+    Exact maze distances from k landmark cells to every open cell, for ALT
+    (A*, landmarks, triangle inequality) heuristics.
+
+    Landmarks are chosen by farthest-point selection: the first is the cell
+    farthest from cell 0 and every further one is the cell farthest from
+    its closest landmark so far. By the triangle inequality,
+    |d(L, a) - d(L, b)| <= d(a, b) for every landmark L, so the largest of
+    these differences is a consistent lower bound on the maze distance. A
+    larger k costs k more ints per cell and gives tighter bounds.
+    """
+    def __init__(self, adjacency, k):
+        self.cellIds = adjacency.cellIds
+        neighbors = [[nextId for nextId, action in moves] for moves in adjacency.neighbors]
+        numCells = len(neighbors)
+        self.landmarks = []
+        rows = []
+        if numCells:
+            # distance from every cell to its closest landmark so far; cells
+            # that no landmark reaches are infinitely far and picked next
+            closest = [d if d >= 0 else float('inf') for d in breadthFirstDistances(0, neighbors)]
+            while len(rows) < min(k, numCells):
+                source = max(range(numCells), key=closest.__getitem__)
+                row = breadthFirstDistances(source, neighbors)
+                if not rows:
+                    closest = [float('inf')] * numCells
+                closest = [d if 0 <= d < c else c for c, d in zip(closest, row)]
+                self.landmarks.append(adjacency.cells[source])
+                rows.append(row)
+        # the k landmark distances of every cell, indexed by cell id
+        self.vectors = list(zip(*rows)) if rows else [()] * numCells
+
+    def getLowerBound(self, pos1, pos2):
+        "Returns a lower bound on the maze distance between two open cells"
+        vector1 = self.vectors[self.cellIds[pos1]]
+        vector2 = self.vectors[self.cellIds[pos2]]
+        return max([abs(d1 - d2) for d1, d2 in zip(vector1, vector2)], default=0)
+
+class CorridorGraph:
+    """
+    A maze contracted to the cells where a search has a real choice to make.
+
+    The nodes are the open cells that do not have exactly two open
+    neighbours (junctions and dead ends) plus any keyCells, such as a start
+    or goal position. Every other cell lies on a corridor between two nodes
+    and is folded into the edge for that corridor.
+
+    edges maps each node to a list of ( endNode, actions, cells ) triples,
+    one per corridor leaving it, where actions are the Directions walked
+    and cells the positions entered on the way to endNode.
+    """
+
+    def __init__(self, adjacency, keyCells=()):
+        successors = adjacency.successors
+        self.nodes = set(cell for cell in adjacency.cells if len(successors[cell]) != 2)
+        self.nodes.update(cell for cell in keyCells if cell in successors)
+        self.edges = {}
+        for node in self.nodes:
+            edges = []
+            for cell, action in successors[node]:
+                previous, actions, cells = node, [action], [cell]
+                while cell not in self.nodes:
+                    # A corridor cell has two moves and one of them leads back
+                    nextCell, nextAction = next(move for move in successors[cell] if move[0] != previous)
+                    previous, cell = cell, nextCell
+                    actions.append(nextAction)
+                    cells.append(cell)
+                edges.append((cell, tuple(actions), tuple(cells)))
+            self.edges[node] = edges
+
+    def getEdges(self, node):
+        return self.edges[node]
+
+class MazeDistances:
+    """
+    Shortest path lengths between every pair of open cells of a maze.
+
+    Every open cell gets an integer id and a breadth-first search is run from
+    each of them once; the results are kept in a compact NumPy matrix indexed
+    by cell id, so a distance lookup is O(1) afterwards. Unreachable pairs
+    are stored as -1.
+
+    If a cacheFile is given, the matrix is memory-mapped from it when it
+    exists and written to it otherwise, so later runs and parallel worker
+    processes share the same read-only pages instead of recomputing.
+    """
+
+    def __init__(self, walls, cacheFile=None):
+        self.cells = walls.asList(False)
+        self.cellIds = dict((cell, i) for i, cell in enumerate(self.cells))
+        self.distances = None
+        if cacheFile is not None:
+            self.distances = self._load(cacheFile)
+        if self.distances is None:
+            self.distances = self._compute(walls)
+            if cacheFile is not None:
+                self._save(cacheFile)
+
+    def _compute(self, walls):
+        numCells = len(self.cells)
+        dtype = np.int16 if numCells <= np.iinfo(np.int16).max else np.int32
+        distances = np.full((numCells, numCells), -1, dtype=dtype)
+        adjacency = Adjacency(walls)
+        neighbors = [[nextId for nextId, action in moves] for moves in adjacency.neighbors]
+        for source in range(numCells):
+            distances[source] = breadthFirstDistances(source, neighbors)
+        return distances
+
+    def _load(self, cacheFile):
+        if not os.path.exists(cacheFile):
+            return None
+        try:
+            distances = np.load(cacheFile, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        numCells = len(self.cells)
+        if distances.shape != (numCells, numCells):
+            return None
+        return distances
+
+    def _save(self, cacheFile):
+        # Write to a temporary file first so concurrent readers never see a
+        # partial table; a failure only means the next run recomputes it.
+        tmpName = None
+        try:
+            directory = os.path.dirname(cacheFile)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmpName = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, self.distances)
+            os.replace(tmpName, cacheFile)
+            tmpName = None
+        except OSError:
+            pass
+        finally:
+            if tmpName is not None and os.path.exists(tmpName):
+                os.unlink(tmpName)
+
+    def getCellId(self, pos):
+        return self.cellIds[pos]
+
+    def getDistance(self, pos1, pos2):
+        "Returns the maze distance between two open cells"
+        return int(self.distances[self.cellIds[pos1], self.cellIds[pos2]])
+
+    def getDistancesFrom(self, pos):
+        "Returns the row of distances from pos to every cell, indexed by cell id"
+        return self.distances[self.cellIds[pos]]
+
+def breadthFirstDistances(source, neighbors):
+    """
+    Returns the number of steps from cell id source to every cell id, -1 if
+    it cannot be reached. neighbors lists the adjacent cell ids of each cell.
+    """
+    row = [-1] * len(neighbors)
+    row[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth += 1
+        nextFrontier = []
+        for cell in frontier:
+            for neighbor in neighbors[cell]:
+                if row[neighbor] < 0:
+                    row[neighbor] = depth
+                    nextFrontier.append(neighbor)
+        frontier = nextFrontier
+    return row
+
+def getLayout(name, back = 2, bitboard = False):
     if name.endswith('.lay'):
-        layout = tryToLoad('layouts/' + name)
-        if layout == None: layout = tryToLoad(name)
+        layout = tryToLoad('layouts/' + name, bitboard)
+        if layout == None: layout = tryToLoad(name, bitboard)
     else:
-        layout = tryToLoad('layouts/' + name + '.lay')
-        if layout == None: layout = tryToLoad(name + '.lay')
+        layout = tryToLoad('layouts/' + name + '.lay', bitboard)
+        if layout == None: layout = tryToLoad(name + '.lay', bitboard)
     if layout == None and back >= 0:
         curdir = os.path.abspath('.')
         os.chdir('..')
-        layout = getLayout(name, back -1)
+        layout = getLayout(name, back -1, bitboard)
         os.chdir(curdir)
     return layout
 
-def tryToLoad(fullname):
+def tryToLoad(fullname, bitboard=False):
     if(not os.path.exists(fullname)): return None
     f = open(fullname)
-    try: return Layout([line.strip() for line in f])
+    try: return Layout([line.strip() for line in f], bitboard)
     finally: f.close()
@@ -41,6 +41,7 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
 
 import layout.layout as layout
 import sys, types, time, random, os
@@ -72,13 +73,18 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
-    def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
-        return tmp
-    getAndResetExplored = staticmethod(getAndResetExplored)
+    def getAndResetExplored( state=None ):
+        """
+        Returns the states kept by the ExploredStates of state's game, or
+        without a state by EXPLORED, that of the last game started with
+        trackExplored, and resets the tracker. An untracked game has none
+        and gives an empty set. The tracker is reset in place, so
+        game.explored and every state of its game go on counting into it.
+        """
+        explored = EXPLORED if state is None else state.data.explored
+        if explored is None: return set()
+        return explored.reset()
+    getAndResetExplored = staticmethod( getAndResetExplored )
 
     def getLegalActions( self, agentIndex=0 ):
         """
@@ -113,7 +119,7 @@ class GameState:
         if agentIndex == 0:
             state.data.scoreChange += -TIME_PENALTY # Penalty for waiting around
         else:
-            GhostRules.decrementTimer( state.data.agentStates[agentIndex] )
+            GhostRules.decrementTimer( state.data.ownAgentState( agentIndex ) )
 
         # Resolve multi-agent effects
         GhostRules.checkDeath( state, agentIndex )
@@ -121,8 +127,8 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if state.data.explored is not None:
+            state.data.explored.add(self, state)
         return state
 
     def getLegalPacmanActions( self ):
@@ -232,6 +238,16 @@ class GameState:
         state.data = self.data.deepCopy()
         return state
 
+    def readOnlyCopy( self ):
+        """
+        A copy that shares the food and the layout with this state, see
+        GameStateData.readOnlyCopy. Changing its food or agent states raises
+        an error; its successors are ordinary states.
+        """
+        state = GameState( self )
+        state.data = self.data.readOnlyCopy()
+        return state
+
     def __eq__( self, other ):
         """
         Allows two states to be compared.
@@ -254,6 +270,37 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+class ExploredStates:
+    """
+    Instrumentation of one game: counts the successors generated and keeps
+    up to limit of the distinct states involved, so memory stays bounded
+    however long the game runs. A limit of 0 only counts, None keeps every
+    state.
+    """
+    def __init__( self, limit=None ):
+        self.limit = limit
+        self.states = set()
+        self.generated = 0
+
+    def add( self, state, successor ):
+        self.generated += 1
+        for s in (state, successor):
+            if self.limit is None or len(self.states) < self.limit:
+                self.states.add(s)
+
+    def reset( self ):
+        "Starts counting from scratch and returns the states kept so far"
+        states = self.states
+        self.states = set()
+        self.generated = 0
+        return states
+
+    def __str__( self ):
+        return '%d successors generated, %d states kept' % (self.generated, len(self.states))
+
+# The ExploredStates of the last game started with trackExplored, see GameState.getAndResetExplored
+EXPLORED = ExploredStates()
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -273,12 +320,22 @@ class ClassicGameRules:
     def __init__(self, timeout=30):
         self.timeout = timeout
 
-    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False, foodEdible=True):
+    def newGame( self, layout, pacmanAgent, ghostAgents, display, quiet = False, catchExceptions=False, foodEdible=True, readOnlyObservations=False, trackExplored=None):
+        """
+        trackExplored gives this game an ExploredStates, game.explored, that
+        all of its states count into, keeping at most that many states (0 to
+        only count them). It also becomes EXPLORED. Without it nothing is
+        tracked.
+        """
+        global EXPLORED
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize( layout, len(ghostAgents) )
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        game = Game(agents, display, self, catchExceptions=catchExceptions, readOnlyObservations=readOnlyObservations)
         game.state = initState
+        game.explored = initState.data.explored = None if trackExplored is None else ExploredStates(trackExplored)
+        if game.explored is not None:
+            EXPLORED = game.explored
         self.initialState = initState.deepCopy()
         self.quiet = quiet
         self.foodEdible = foodEdible
@@ -345,7 +402,7 @@ class PacmanRules:
         if action not in legal:
             raise Exception("Illegal action " + str(action))
 
-        pacmanState = state.data.agentStates[0]
+        pacmanState = state.data.ownAgentState( 0 )
 
         # Update Configuration
         vector = Actions.directionToVector( action, PacmanRules.PACMAN_SPEED )
@@ -365,8 +422,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood( position )
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -378,11 +434,11 @@ class PacmanRules:
         # Eat capsule
         if( position in state.getCapsules() ):
             ClassicGameRules.foodEdible = True
-            state.data.capsules.remove( position )
+            state.data.removeCapsule( position )
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range( 1, len( state.data.agentStates ) ):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.ownAgentState( index ).scaredTimer = SCARED_TIME
     consume = staticmethod( consume )
 
 class GhostRules:
@@ -411,7 +467,7 @@ class GhostRules:
         if action not in legal:
             raise Exception("Illegal ghost action " + str(action))
 
-        ghostState = state.data.agentStates[ghostIndex]
+        ghostState = state.data.ownAgentState( ghostIndex )
         speed = GhostRules.GHOST_SPEED
         if ghostState.scaredTimer > 0: speed /= 2.0
         vector = Actions.directionToVector( action, speed )
@@ -421,7 +477,7 @@ class GhostRules:
     def decrementTimer( ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint( ghostState.configuration.pos )
+            ghostState.configuration = Configuration( nearestPoint( ghostState.configuration.pos ), ghostState.configuration.direction )
         ghostState.scaredTimer = max( 0, timer - 1 )
     decrementTimer = staticmethod( decrementTimer )
 
@@ -432,12 +488,12 @@ class GhostRules:
                 ghostState = state.data.agentStates[index]
                 ghostPosition = ghostState.configuration.getPosition()
                 if GhostRules.canKill( pacmanPosition, ghostPosition ):
-                    GhostRules.collide( state, ghostState, index )
+                    GhostRules.collide( state, state.data.ownAgentState( index ), index )
         else:
             ghostState = state.data.agentStates[agentIndex]
             ghostPosition = ghostState.configuration.getPosition()
             if GhostRules.canKill( pacmanPosition, ghostPosition ):
-                GhostRules.collide( state, ghostState, agentIndex )
+                GhostRules.collide( state, state.data.ownAgentState( agentIndex ), agentIndex )
     checkDeath = staticmethod( checkDeath )
 
     def collide( state, ghostState, agentIndex):
@@ -445,7 +501,8 @@ class GhostRules:
             state.data.scoreChange += 200
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
-            # Added for first-person
+            # Added for first-person, the list may be shared with the previous state
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -530,6 +587,14 @@ def readCommand( argv ):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--searchStats', action='store_true', dest='searchStats',
+                      help='Prints counters and timings of the searches run by search agents', default=False)
+    parser.add_option('--bitboard', action='store_true', dest='bitboard',
+                      help='Keeps the food of the layout in a bitboard (game.BitGrid)', default=False)
+    parser.add_option('--trackExplored', dest='trackExplored', type='int', metavar='LIMIT',
+                      help='Counts the successors generated in each game and keeps up to LIMIT of the states in game.explored', default=None)
+    parser.add_option('--readOnlyObservations', action='store_true', dest='readOnlyObservations',
+                      help='Gives agents read-only views of the food and agent states instead of copying the food every move', default=False)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -540,9 +605,14 @@ def readCommand( argv ):
     if options.fixRandomSeed: random.seed('cs188')
 
     # Choose a layout
-    args['layout'] = layout.getLayout( options.layout )
+    args['layout'] = layout.getLayout( options.layout, bitboard=options.bitboard )
     if args['layout'] == None: raise Exception("The layout " + options.layout + " cannot be found")
 
+    # Let search agents instrument their searches
+    if options.searchStats:
+        import search.search as search
+        search.COLLECT_STATISTICS = True
+
     # Choose a Pacman agent
     noKeyboard = options.gameToReplay == None and (options.textGraphics or options.quietGraphics)
     pacmanType = loadAgent(options.pacman, noKeyboard)
@@ -577,6 +647,8 @@ def readCommand( argv ):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['readOnlyObservations'] = options.readOnlyObservations
+    args['trackExplored'] = options.trackExplored
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -650,7 +722,7 @@ def replayGame( layout, actions, display ):
 
     display.finish()
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30):
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining = 0, catchExceptions=False, timeout=30, readOnlyObservations=False, trackExplored=None):
     import __main__
     __main__.__dict__['_display'] = display
 
@@ -667,7 +739,7 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining = 0,
         else:
             gameDisplay = display
             rules.quiet = False
-        game = rules.newGame(layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions)
+        game = rules.newGame(layout, pacman, ghosts, gameDisplay, beQuiet, catchExceptions, readOnlyObservations=readOnlyObservations, trackExplored=trackExplored)
         game.run()
         if not beQuiet: games.append(game)
 
@@ -687,6 +759,8 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining = 0,
         print('Scores:       ', ', '.join([str(score) for score in scores]))
         print('Win Rate:      %d/%d (%.2f)' % (wins.count(True), len(wins), winRate))
         print('Record:       ', ', '.join([ ['Loss', 'Win'][int(w)] for w in wins]))
+        if trackExplored is not None:
+            print('Explored:     ', ', '.join([str(game.explored) for game in games]))
 
     return games
 
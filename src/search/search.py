@@ -20,8 +20,34 @@ Pacman agents (in searchAgents.py).
 from cmath import inf
 from itertools import accumulate
 from queue import PriorityQueue
+from math import inf as INF
+from multiprocessing.connection import wait
+from queue import Empty
+import multiprocessing
+import pickle
+import sys
+import time
+import traceback
+import weakref
 import utils.util as util
 
+# Default number of states remembered by the iterative deepening searches
+TRANSPOSITION_TABLE_SIZE = 10000
+# Default time budget of the anytime search, below the default --timeout of 30s
+ANYTIME_TIME_LIMIT = 20.0
+# Set by pacman.py --searchStats: search agents then collect and print SearchStatistics
+COLLECT_STATISTICS = False
+# Default guarantee of the portfolio search: the plan costs at most this times the optimal cost
+PORTFOLIO_SUBOPTIMALITY = 1.0
+# Default number of worker processes of hash distributed A*, and of nodes per message between them
+HDA_WORKERS = multiprocessing.cpu_count()
+HDA_BATCH_SIZE = 128
+# Seconds the processes of hash distributed A* wait for a message before checking on each other
+HDA_POLL_INTERVAL = 0.001
+# The queues and closed lists of utils.util a search takes from getContainers
+CONTAINERS = ['Stack', 'Queue', 'PriorityQueue', 'IndexedPriorityQueue', 'BucketPriorityQueue',
+              'ClosedSet', 'ClosedTable']
+
 class SearchProblem:
     """
     This class outlines the structure of a search problem, but doesn't implement
@@ -92,26 +118,28 @@ def depthFirstSearch(problem):
     "*** YOUR CODE HERE ***"
 
     # graphs may contian cycles, so we need to keep track of visited nodes
-    visited = set()
-    stack = util.Stack()
+    containers = getContainers(problem)
+    visited = containers.ClosedSet()
+    stack = containers.Stack()
+    # nodes are stored once in the table, the stack only holds their ids
+    nodes = util.NodeTable()
     # find the initial state and push it to queue
     initialState = problem.getStartState()
-    startNode = (initialState, '', 0, [])
-    stack.push(startNode)
+    stack.push(nodes.add(initialState))
     # loop until the stack is empty
     while not stack.isEmpty():
         currentNode = stack.pop()
-        state, action, cost, path = currentNode
+        state = nodes.getState(currentNode)
         if not state in visited:
             visited.add(state)
             # check if goal state
             if problem.isGoalState(state):
-                return path[1:] + [currentNode[1]]
+                return nodes.getPath(currentNode)
             # expand node to get successors
+            cost = nodes.getCost(currentNode)
             for succ in problem.getSuccessors(state):
                 succState, succAction, succCost = succ
-                newNode = (succState, succAction, cost + succCost, path + [action])
-                stack.push(newNode)
+                stack.push(nodes.add(succState, currentNode, succAction, cost + succCost))
     # there is no solution
     return []
 
@@ -119,26 +147,27 @@ def breadthFirstSearch(problem):
     """Search the shallowest nodes in the search tree first."""
     "*** YOUR CODE HERE ***"
     # graphs may contian cycles, so we need to keep track of visited nodes
-    visited = set()
-    queue = util.Queue()
+    containers = getContainers(problem)
+    visited = containers.ClosedSet()
+    queue = containers.Queue()
+    # nodes are stored once in the table, the queue only holds their ids
+    nodes = util.NodeTable()
     # find the initial state and push it to queue
     initialState = problem.getStartState()
-    startNode = (initialState, '', 0, [])
-    queue.push(startNode)
+    queue.push(nodes.add(initialState))
     # loop until the stack is empty
     while not queue.isEmpty():
         currentNode = queue.pop()
-        state, action, cost, path = currentNode
+        state = nodes.getState(currentNode)
         if not state in visited:
             visited.add(state)
             # check if goal state
             if problem.isGoalState(state):
-                return path[1:] + [currentNode[1]]
+                return nodes.getPath(currentNode)
             # expand node to get successors
-            for succ in problem.getSuccessors(state):
-                succState, succAction, succCost = succ
-                newNode = (succState, succAction, cost + succCost, path + [action])
-                queue.push(newNode)
+            cost = nodes.getCost(currentNode)
+            queue.pushMany(nodes.add(succState, currentNode, succAction, cost + succCost)
+                           for succState, succAction, succCost in problem.getSuccessors(state))
     # there is no solution
     return []
 
@@ -146,28 +175,43 @@ def uniformCostSearch(problem):
     """Search the node of least total cost first."""
     "*** YOUR CODE HERE ***"
     
-    visited = set()
-    myPQ = util.PriorityQueue()
+    # states are hashed once into integer ids, everything else is keyed by id
+    stateIds = dict()
+    containers = getContainers(problem)
+    visited = containers.ClosedSet()
+    # the queue holds each open state once and lowers its cost in place;
+    # integer costs go into buckets, anything else into a heap
+    myPQ = containers.BucketPriorityQueue()
+    nodes = util.NodeTable()
+    bestNode = dict() # best known node for every open state
     # find the initial state and push it to queue
     initialState = problem.getStartState()
-    startNode = (initialState, '', 0, [])
-    myPQ.push(startNode, 0)
+    stateIds[initialState] = 0
+    bestNode[0] = nodes.add(initialState)
+    myPQ.push(0, 0)
     
     # loop until the stack is empty
     while not myPQ.isEmpty():
-        currentNode = myPQ.pop()
-        state, action, cost, path = currentNode
-        if not state in visited:
-            visited.add(state)
-            # check if goal state
-            if problem.isGoalState(state):
-                return path[1:] + [currentNode[1]]
-            # expand node to get successors
-            for succ in problem.getSuccessors(state):
-                succState, succAction, succCost = succ
-                totalCost = cost + succCost
-                newNode = (succState, succAction, totalCost, path + [action])
-                myPQ.push(newNode, totalCost)
+        stateId = myPQ.pop()
+        currentNode = bestNode.pop(stateId)
+        state = nodes.getState(currentNode)
+        visited.add(stateId)
+        # check if goal state
+        if problem.isGoalState(state):
+            return nodes.getPath(currentNode)
+        # expand node to get successors
+        cost = nodes.getCost(currentNode)
+        for succ in problem.getSuccessors(state):
+            succState, succAction, succCost = succ
+            succId = stateIds.setdefault(succState, len(stateIds))
+            totalCost = cost + succCost
+            if succId in myPQ:
+                if totalCost < myPQ.getPriority(succId):
+                    bestNode[succId] = nodes.add(succState, currentNode, succAction, totalCost)
+                    myPQ.decreaseKey(succId, totalCost)
+            elif succId not in visited:
+                bestNode[succId] = nodes.add(succState, currentNode, succAction, totalCost)
+                myPQ.push(succId, totalCost)
     
     # there is no solution
     return []
@@ -184,33 +228,382 @@ def aStarSearch(problem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
 
-    myPQ = util.PriorityQueue()
+    # states are hashed once into integer ids, everything else is keyed by id
+    stateIds = dict()
+    containers = getContainers(problem)
+    # the queue holds each open state once and lowers its f value in place;
+    # integer f values go into buckets, anything else into a heap
+    myPQ = containers.BucketPriorityQueue()
+    nodes = util.NodeTable()
+    bestNode = dict() # best known node for every open state
     startState = problem.getStartState()
-    startNode = (startState, '',0, [])
-    myPQ.push(startNode,heuristic(startState,problem))
-    visited = set()
-    best_g = dict()
+    stateIds[startState] = 0
+    bestNode[0] = nodes.add(startState)
+    myPQ.push(0,heuristic(startState,problem))
+    best_g = containers.ClosedTable() # closed list with the cost each state was expanded at
 
     # loop until the stack is empty
     while not myPQ.isEmpty():
-        node = myPQ.pop()
-        state, action, cost, path = node
-        if (not state in visited) or cost < best_g.get(state):
-            visited.add(state)
-            best_g[state]=cost
-            if problem.isGoalState(state):
-                path = path + [(state, action)]
-                actions = [action[1] for action in path]
-                del actions[0]
-                return actions
-            for succ in problem.getSuccessors(state):
-                succState, succAction, succCost = succ
-                newNode = (succState, succAction, cost + succCost, path + [(state, action)])
-                h = heuristic(succState, problem) + cost + succCost
-                myPQ.push(newNode, h)
+        stateId = myPQ.pop()
+        node = bestNode.pop(stateId)
+        state, cost = nodes.getState(node), nodes.getCost(node)
+        best_g[stateId]=cost
+        if problem.isGoalState(state):
+            return nodes.getPath(node)
+        for succ in problem.getSuccessors(state):
+            succState, succAction, succCost = succ
+            succId = stateIds.setdefault(succState, len(stateIds))
+            g = cost + succCost
+            if succId in myPQ:
+                if g >= nodes.getCost(bestNode[succId]):
+                    continue
+                bestNode[succId] = nodes.add(succState, node, succAction, g)
+                myPQ.decreaseKey(succId, heuristic(succState, problem) + g)
+            # closed states are only re-opened through a cheaper path
+            elif g < best_g.get(succId, INF):
+                bestNode[succId] = nodes.add(succState, node, succAction, g)
+                myPQ.push(succId, heuristic(succState, problem) + g)
                 
     util.raiseNotDefined()
 
+def jumpPointSearch(problem, heuristic=nullHeuristic):
+    """
+    A* over jump points for 4-connected, unit-cost position problems such as
+    PositionSearchProblem and BidirectionalPositionSearchProblem.
+
+    Instead of pushing every neighbour, each direction is followed in a
+    straight line until a jump point: the goal, a cell with a forced
+    neighbour, or (when moving vertically) a cell from which a horizontal
+    jump finds one. Only jump points are expanded through
+    problem.getSuccessors, so problem._expanded counts them, and the
+    direction back to a node's parent is pruned. The returned path is the
+    usual list of Directions.
+    """
+    walls, goal = problem.walls, problem.goal
+    containers = getContainers(problem)
+    myPQ = containers.BucketPriorityQueue()
+    nodes = util.NodeTable()
+    bestNode = dict() # best known node for every open jump point
+    startState = problem.getStartState()
+    bestNode[startState] = nodes.add(startState)
+    myPQ.push(startState, heuristic(startState, problem))
+    best_g = containers.ClosedTable() # closed list with the cost each jump point was expanded at
+
+    while not myPQ.isEmpty():
+        state = myPQ.pop()
+        node = bestNode.pop(state)
+        cost = nodes.getCost(node)
+        best_g[state] = cost
+        if problem.isGoalState(state):
+            return [action for segment in nodes.getPath(node) for action in segment]
+        x, y = state
+        back = None
+        if nodes.getParent(node) != util.NodeTable.ROOT:
+            px, py = nodes.getState(nodes.getParent(node))
+            back = ((px > x) - (px < x), (py > y) - (py < y))
+        for succState, succAction, succCost in problem.getSuccessors(state):
+            dx, dy = succState[0] - x, succState[1] - y
+            if (dx, dy) == back:
+                continue
+            jumpPoint = jump(walls, x, y, dx, dy, goal)
+            if jumpPoint is None:
+                continue
+            jumpState, steps = jumpPoint
+            g = cost + steps
+            if jumpState in myPQ:
+                if g >= nodes.getCost(bestNode[jumpState]):
+                    continue
+                bestNode[jumpState] = nodes.add(jumpState, node, (succAction,) * steps, g)
+                myPQ.decreaseKey(jumpState, heuristic(jumpState, problem) + g)
+            elif g < best_g.get(jumpState, INF):
+                bestNode[jumpState] = nodes.add(jumpState, node, (succAction,) * steps, g)
+                myPQ.push(jumpState, heuristic(jumpState, problem) + g)
+
+    util.raiseNotDefined()
+
+def jump(walls, x, y, dx, dy, goal):
+    """
+    Walks from (x, y) in direction (dx, dy) and returns the first jump point
+    with the number of steps taken, or None if a wall comes first.
+    """
+    steps = 0
+    while True:
+        x, y = x + dx, y + dy
+        steps += 1
+        if walls[x][y]:
+            return None
+        if (x, y) == goal:
+            return (x, y), steps
+        if dx:
+            # a wall beside the previous cell opens up beside this one
+            if (not walls[x][y - 1] and walls[x - dx][y - 1]) or \
+               (not walls[x][y + 1] and walls[x - dx][y + 1]):
+                return (x, y), steps
+        else:
+            if (not walls[x - 1][y] and walls[x - 1][y - dy]) or \
+               (not walls[x + 1][y] and walls[x + 1][y - dy]):
+                return (x, y), steps
+            if jump(walls, x, y, 1, 0, goal) or jump(walls, x, y, -1, 0, goal):
+                return (x, y), steps
+
+def iterativeDeepeningAStar(problem, heuristic=nullHeuristic, tableSize=TRANSPOSITION_TABLE_SIZE):
+    """
+    IDA*: repeated depth-first searches that only follow nodes whose
+    cost + heuristic stays within a bound, raising the bound to the smallest
+    value that exceeded it until a goal is found. Returns an optimal plan
+    for an admissible heuristic.
+
+    Only the current path is kept, plus a transposition table of at most
+    tableSize states holding the cheapest cost each was reached at in this
+    iteration, so memory grows with the solution depth instead of the
+    number of states. tableSize=0 disables the table.
+    """
+    return iterativeDeepening(problem, heuristic, tableSize, False)
+
+def iterativeDeepeningSearch(problem, heuristic=nullHeuristic, tableSize=TRANSPOSITION_TABLE_SIZE):
+    """
+    Iterative deepening DFS: like iterativeDeepeningAStar but the bound is
+    on the number of actions, so it returns a shortest plan like
+    breadthFirstSearch does. A heuristic, if given, must never overestimate
+    the number of actions left.
+    """
+    return iterativeDeepening(problem, heuristic, tableSize, True)
+
+def iterativeDeepening(problem, heuristic, tableSize, unitCost):
+    """Runs contour searches with growing bounds until one finds a plan."""
+    startState = problem.getStartState()
+    bound = heuristic(startState, problem)
+    while bound < INF:
+        plan, bound = contourSearch(problem, startState, bound, heuristic, tableSize, unitCost)
+        if plan is not None:
+            return plan
+    # there is no solution
+    return []
+
+def contourSearch(problem, startState, bound, heuristic, tableSize, unitCost):
+    """
+    Depth-first search over the nodes with g + h <= bound, where g counts
+    actions if unitCost is set. Returns (plan, bound) when a goal is found
+    and (None, nextBound) otherwise, nextBound being the smallest g + h that
+    was cut off.
+    """
+    if problem.isGoalState(startState):
+        return [], bound
+    nextBound = INF
+    # the current path, one entry per depth
+    states, actions, costs = [startState], [], [0]
+    onPath = {startState}
+    table = {startState: 0} if tableSize > 0 else {}
+    stack = [iter(problem.getSuccessors(startState))]
+    while stack:
+        for succState, succAction, succCost in stack[-1]:
+            if succState in onPath:
+                continue
+            g = costs[-1] + (1 if unitCost else succCost)
+            # reached before in this iteration at no higher cost
+            if table.get(succState, INF) <= g:
+                continue
+            value = g + heuristic(succState, problem)
+            if value > bound:
+                nextBound = min(nextBound, value)
+                continue
+            if problem.isGoalState(succState):
+                return actions + [succAction], bound
+            if succState in table or len(table) < tableSize:
+                table[succState] = g
+            states.append(succState)
+            actions.append(succAction)
+            costs.append(g)
+            onPath.add(succState)
+            stack.append(iter(problem.getSuccessors(succState)))
+            break
+        else:
+            # every successor is done, backtrack
+            stack.pop()
+            onPath.discard(states.pop())
+            costs.pop()
+            if actions:
+                actions.pop()
+    return None, nextBound
+
+def anytimeAStarSearch(problem, heuristic=nullHeuristic, timeLimit=ANYTIME_TIME_LIMIT,
+                       initialWeight=2.5, weightStep=0.5):
+    """
+    Anytime Repairing A* (ARA*). Runs weighted A* with f = g + w * h starting
+    at w = initialWeight, then lowers w by weightStep and repairs the search
+    instead of starting over: states whose cost improved after they were
+    expanded are carried into the next iteration. Every solution found is
+    no more than the printed bound times the optimal cost.
+
+    When timeLimit seconds have passed the best plan found so far is
+    returned; the search only runs over the budget while it has no plan at
+    all. With enough time it ends at w = 1 with an optimal plan for an
+    admissible heuristic.
+    """
+    deadline = time.time() + timeLimit
+    hValues = dict()
+    def h(state):
+        if state not in hValues:
+            hValues[state] = heuristic(state, problem)
+        return hValues[state]
+
+    containers = getContainers(problem)
+    nodes = util.NodeTable()
+    bestNode = dict() # node with the lowest known cost for every reached state
+    startState = problem.getStartState()
+    bestNode[startState] = nodes.add(startState)
+    weight = max(initialWeight, 1.0)
+    myPQ = containers.IndexedPriorityQueue()
+    myPQ.push(startState, weight * h(startState))
+    closed, incons = containers.ClosedSet(), set()
+    goalNode, goalCost = None, INF
+
+    while True:
+        # improve the path with the current weight
+        while not myPQ.isEmpty() and goalCost > myPQ.getMinimumPriority():
+            if goalNode is not None and time.time() > deadline:
+                return nodes.getPath(goalNode)
+            state = myPQ.pop()
+            node = bestNode[state]
+            cost = nodes.getCost(node)
+            closed.add(state)
+            if problem.isGoalState(state):
+                if cost < goalCost:
+                    goalNode, goalCost = node, cost
+                continue
+            for succState, succAction, succCost in problem.getSuccessors(state):
+                g = cost + succCost
+                if succState in bestNode and g >= nodes.getCost(bestNode[succState]):
+                    continue
+                bestNode[succState] = nodes.add(succState, node, succAction, g)
+                if succState in closed:
+                    incons.add(succState)
+                elif succState in myPQ:
+                    myPQ.decreaseKey(succState, g + weight * h(succState))
+                else:
+                    myPQ.push(succState, g + weight * h(succState))
+
+        if goalNode is None:
+            # there is no solution
+            return []
+        lowerBound = min([nodes.getCost(bestNode[state]) + h(state)
+                          for state in myPQ.getItems() + list(incons)], default=goalCost)
+        bound = max(1.0, min(weight, goalCost / lowerBound)) if lowerBound > 0 else weight
+        print('[anytimeAStarSearch] cost %s with weight %.2f, suboptimality bound %.2f' % (goalCost, weight, bound))
+        if bound <= 1 or time.time() > deadline:
+            return nodes.getPath(goalNode)
+
+        # lower the weight and reopen everything that is open or inconsistent
+        weight = max(1.0, weight - weightStep)
+        openStates = myPQ.getItems() + list(incons)
+        myPQ = containers.IndexedPriorityQueue()
+        for state in openStates:
+            myPQ.push(state, nodes.getCost(bestNode[state]) + weight * h(state))
+        closed, incons = containers.ClosedSet(), set()
+
+class DStarLite:
+    """
+    Incremental planner for shortest paths from a moving start to the
+    nearest of a changing set of goal states (D* Lite).
+
+    The search runs backwards from the goals, so g and rhs are distances to
+    the nearest goal. They are kept between plans: after setStart or
+    setGoals only the states whose distance changed are repaired instead of
+    searching again from scratch. problem.getSuccessors gives the moves out
+    of a state and must be symmetric, as in a Pacman maze, because it is
+    also used for the moves into it; problem.isGoalState is not used.
+    heuristic(state1, state2) must never overestimate the cost between two
+    states, e.g. util.manhattanDistance for positions.
+    """
+
+    def __init__(self, problem, goalStates, heuristic=lambda state1, state2: 0):
+        self.problem = problem
+        self.heuristic = heuristic
+        self.start = self.lastStart = problem.getStartState()
+        self.km = 0 # heuristic drift from all moves of the start so far
+        self.g, self.rhs = dict(), dict()
+        self.successors = dict() # getSuccessors of every state seen so far
+        self.goals = set()
+        self.queue = getContainers(problem).IndexedPriorityQueue()
+        self.setGoals(goalStates)
+
+    def setStart(self, state):
+        "Moves the start state, e.g. to Pacman's new position"
+        self.km += self.heuristic(self.lastStart, state)
+        self.start = self.lastStart = state
+
+    def setGoals(self, goalStates):
+        "Replaces the goal states, repairing only around those that changed"
+        goalStates = set(goalStates)
+        changed = self.goals ^ goalStates
+        self.goals = goalStates
+        for state in changed:
+            self.updateState(state)
+
+    def removeGoals(self, goalStates):
+        "Drops some goal states, e.g. the food Pacman has eaten"
+        self.setGoals(self.goals.difference(goalStates))
+
+    def getPlan(self):
+        "Returns the actions of a shortest path from the start to the nearest goal"
+        self.computeShortestPath()
+        if self.g.get(self.start, INF) == INF:
+            # there is no solution
+            return []
+        g, plan, state = self.g, [], self.start
+        while state not in self.goals:
+            succState, succAction, succCost = min(self.getSuccessors(state),
+                                                  key=lambda succ: succ[2] + g.get(succ[0], INF))
+            plan.append(succAction)
+            state = succState
+        return plan
+
+    def getCost(self):
+        "Returns the cost of the current plan, INF if no goal can be reached"
+        self.computeShortestPath()
+        return self.g.get(self.start, INF)
+
+    def getSuccessors(self, state):
+        if state not in self.successors:
+            self.successors[state] = self.problem.getSuccessors(state)
+        return self.successors[state]
+
+    def calculateKey(self, state):
+        distance = min(self.g.get(state, INF), self.rhs.get(state, INF))
+        return (distance + self.heuristic(self.start, state) + self.km, distance)
+
+    def updateState(self, state):
+        if state in self.goals:
+            self.rhs[state] = 0
+        else:
+            g = self.g
+            self.rhs[state] = min([succCost + g.get(succState, INF)
+                                   for succState, succAction, succCost in self.getSuccessors(state)],
+                                  default=INF)
+        if state in self.queue:
+            self.queue.remove(state)
+        if self.g.get(state, INF) != self.rhs[state]:
+            self.queue.push(state, self.calculateKey(state))
+
+    def computeShortestPath(self):
+        g, rhs, queue = self.g, self.rhs, self.queue
+        while not queue.isEmpty() and (queue.getMinimumPriority() < self.calculateKey(self.start) or
+                                       rhs.get(self.start, INF) != g.get(self.start, INF)):
+            oldKey = queue.getMinimumPriority()
+            state = queue.pop()
+            newKey = self.calculateKey(state)
+            if oldKey < newKey:
+                queue.push(state, newKey)
+            elif g.get(state, INF) > rhs[state]:
+                g[state] = rhs[state]
+                for predState, predAction, predCost in self.getSuccessors(state):
+                    self.updateState(predState)
+            else:
+                g[state] = INF
+                self.updateState(state)
+                for predState, predAction, predCost in self.getSuccessors(state):
+                    self.updateState(predState)
+
 def enforcedHillClimbing(problem, heuristic=nullHeuristic):
     """
     Local search with heuristic function.
@@ -219,46 +612,39 @@ def enforcedHillClimbing(problem, heuristic=nullHeuristic):
     It will be pass to this function as second argument (heuristic).
     """
     "*** YOUR CODE HERE FOR TASK 1 ***"
-    # make root node
-    initialState = problem.getStartState()
-    startNode = (initialState, '', 0, [])
-    while not problem.isGoalState(startNode[0]):
-        startNode = improve(startNode, problem, heuristic)
-    path = extractPath(startNode)
+    # make root node, the node table is shared by every improve step
+    nodes = util.NodeTable()
+    startNode = nodes.add(problem.getStartState())
+    while not problem.isGoalState(nodes.getState(startNode)):
+        startNode = improve(startNode, nodes, problem, heuristic)
+    path = nodes.getPath(startNode)
     print("path: ", path)
     return path
 
 # Know why you didn't pass the test-cases
 # improve the code
-def improve(startNode, problem, heuristic=nullHeuristic):
+def improve(startNode, nodes, problem, heuristic=nullHeuristic):
     """Breadth-First Search approach to improve the local search"""
-    queue = util.Queue() # open list (FIFO)
+    containers = getContainers(problem)
+    queue = containers.Queue() # open list (FIFO)
     queue.push(startNode)
-    visited = set() # closed list
+    visited = containers.ClosedSet() # closed list
+    startHeuristic = heuristic(nodes.getState(startNode), problem)
     # loop until the stack is empty
     while not queue.isEmpty():
         currentNode = queue.pop()
-        state, action, cost, path = currentNode
+        state = nodes.getState(currentNode)
         if not state in visited:
             visited.add(state)
             # if we find a better node with shorter heuristic to goal state, return it
-            if heuristic(state,problem) < heuristic(startNode[0],problem):
+            if heuristic(state,problem) < startHeuristic:
                 return currentNode
             # expand node to get successors
-            for succ in problem.getSuccessors(state):
-                succState, succAction, succCost = succ
-                newNode = (succState, succAction, cost + succCost, path + [(state, action)])
-                queue.push(newNode)
+            cost = nodes.getCost(currentNode)
+            queue.pushMany(nodes.add(succState, currentNode, succAction, cost + succCost)
+                           for succState, succAction, succCost in problem.getSuccessors(state))
     util.raiseNotDefined()
 
-def extractPath(goalNode):
-    """Extract the path from the node"""
-    state, action, cost, totalPath = goalNode
-    actions = [x[1] for x in totalPath[1:]]
-    actions = actions + [action]
-    return actions
-
-from math import inf as INF   
 def bidirectionalAStarEnhanced(problem, heuristic=nullHeuristic, backwardsHeuristic=nullHeuristic):
     """
     Bidirectional global search with heuristic function.
@@ -271,23 +657,26 @@ def bidirectionalAStarEnhanced(problem, heuristic=nullHeuristic, backwardsHeuris
     startState = problem.getStartState()
     goalStates = problem.getGoalStates()
     # The problem passed in going to be BidirectionalPositionSearchProblem    
-    fPQ = util.PriorityQueue() # open list forward
-    bPQ = util.PriorityQueue() # open list backward
+    containers = getContainers(problem)
+    fPQ = containers.IndexedPriorityQueue() # open list forward
+    bPQ = containers.IndexedPriorityQueue() # open list backward
 
-    fVisited = set() # closed list forward
-    bVisited = set() # closed list backward
+    fVisited = containers.ClosedSet() # closed list forward
+    bVisited = containers.ClosedSet() # closed list backward
     lowerBound = 0 # lower bound
     upperBound = INF # upper bound
     bestPlan = []   
     x = 0 # start forward - binary {0: 'forward', 1: ''backward'}
+    fNodes = util.NodeTable() # nodes forward
+    bNodes = util.NodeTable(reverse=True) # nodes backward, paths lead to the goal
+    fOpen = {} # open state -> best node forward
+    bOpen = {} # open state -> best node backward
 
     # Initialize the open and closed lists
-    startNode = (startState, '', 0, [])
-    fPQ.push(startNode,heuristic(startState,problem))
+    updateFrontier(fPQ, fOpen, fNodes.add(startState), fNodes, heuristic(startState,problem))
     # create multiple goal nodes and put them to fringe
     for goalState in goalStates:
-        goalNode = (goalState, '', 0, [])
-        bPQ.push(goalNode,backwardsHeuristic(goalState,problem))
+        updateFrontier(bPQ, bOpen, bNodes.add(goalState), bNodes, backwardsHeuristic(goalState,problem))
     
     # Loop until the open lists (frontier) is empty
     while (not fPQ.isEmpty() and not bPQ.isEmpty()):
@@ -304,10 +693,10 @@ def bidirectionalAStarEnhanced(problem, heuristic=nullHeuristic, backwardsHeuris
         # forward and backward expansion
         if x == 0: # forward
             # print("forward direction:")
-            currentNode = fPQ.pop()
-            fVisited.add(currentNode[0])
+            currentNode = fOpen.pop(fPQ.pop())
+            fVisited.add(fNodes.getState(currentNode))
             # check if directions meet if so update plan and upper bound
-            upperBound, bestPlan = checkMembership(currentNode, bPQ, upperBound, bestPlan, direction=x)
+            upperBound, bestPlan = checkMembership(currentNode, fNodes, bOpen, bNodes, upperBound, bestPlan, direction=x)
             # check if lower bound is greater than upper bound
             if lowerBound >= upperBound:
                 print("Forward BestPlan: ", bestPlan)
@@ -315,22 +704,21 @@ def bidirectionalAStarEnhanced(problem, heuristic=nullHeuristic, backwardsHeuris
                 return bestPlan
         
             # expand node to get forward successors
-            for succ in problem.getSuccessors(currentNode[0]):
+            for succ in problem.getSuccessors(fNodes.getState(currentNode)):
                 succState, succAction, succCost = succ
                 if (succState not in fVisited):
                     # accumulated cost to reach n
-                    accCost = currentNode[2] + succCost
+                    accCost = fNodes.getCost(currentNode) + succCost
                     bfValue = 2*accCost + (heuristic(succState,problem) - backwardsHeuristic(succState,problem))
-                    newNode = (succState, succAction, accCost, currentNode[3] + [succAction])
-                    fPQ.push(newNode, bfValue)
+                    updateFrontier(fPQ, fOpen, fNodes.add(succState, currentNode, succAction, accCost), fNodes, bfValue)
 
         # backward iteration
         elif x==1: # backward
             # print("backward direction:")
-            currentNode = bPQ.pop()
-            bVisited.add(currentNode[0])
+            currentNode = bOpen.pop(bPQ.pop())
+            bVisited.add(bNodes.getState(currentNode))
             # check if directions meet if so update plan and upper bound
-            upperBound, bestPlan = checkMembership(currentNode, fPQ, upperBound, bestPlan, direction=x)
+            upperBound, bestPlan = checkMembership(currentNode, bNodes, fOpen, fNodes, upperBound, bestPlan, direction=x)
             # check if lower bound is greater than upper bound
             if lowerBound >= upperBound:
                 print("Backward BestPlan: ", bestPlan)
@@ -338,14 +726,13 @@ def bidirectionalAStarEnhanced(problem, heuristic=nullHeuristic, backwardsHeuris
                 return bestPlan
             
             # expand node to get backward successors
-            for succ in problem.getBackwardsSuccessors(currentNode[0]):
+            for succ in problem.getBackwardsSuccessors(bNodes.getState(currentNode)):
                 succState, succAction, succCost = succ
                 if (succState not in bVisited):
                     # accumulated cost to reach n
-                    accCost = currentNode[2] + succCost
+                    accCost = bNodes.getCost(currentNode) + succCost
                     bbValue = 2*accCost + (backwardsHeuristic(succState,problem) - heuristic(succState,problem))
-                    newNode = (succState, succAction, accCost, [succAction] + currentNode[3]) # reverse
-                    bPQ.push(newNode, bbValue)
+                    updateFrontier(bPQ, bOpen, bNodes.add(succState, currentNode, succAction, accCost), bNodes, bbValue)
         # choose direction
         x = chooseDirection(x)
     util.raiseNotDefined()
@@ -387,20 +774,23 @@ def bidirectionalAStarEnhanced1(problem, heuristic=nullHeuristic, backwardsHeuri
 
 def findBestPath(startState, goalState, problem, heuristic=nullHeuristic, backwardsHeuristic=nullHeuristic):
     # The problem passed in going to be BidirectionalPositionSearchProblem    
-    fPQ = util.PriorityQueue() # open list forward
-    bPQ = util.PriorityQueue() # open list backward
-    fVisited = set() # closed list forward
-    bVisited = set() # closed list backward
+    containers = getContainers(problem)
+    fPQ = containers.IndexedPriorityQueue() # open list forward
+    bPQ = containers.IndexedPriorityQueue() # open list backward
+    fVisited = containers.ClosedSet() # closed list forward
+    bVisited = containers.ClosedSet() # closed list backward
     lowerBound = 0 # lower bound
     upperBound = INF # upper bound
     currentPlan = [] # path
     x = 0 # start forward - binary {0: 'forward', 1: ''backward'}
     
     # Initialize the open and closed lists
-    startNode = (startState, '', 0, [])
-    fPQ.push(startNode,heuristic(startState,problem))
-    goalNode = (goalState, '', 0, [])
-    bPQ.push(goalNode,backwardsHeuristic(goalState,problem))
+    fNodes = util.NodeTable() # nodes forward
+    bNodes = util.NodeTable() # nodes backward
+    fOpen = {} # open state -> best node forward
+    bOpen = {} # open state -> best node backward
+    updateFrontier(fPQ, fOpen, fNodes.add(startState), fNodes, heuristic(startState,problem))
+    updateFrontier(bPQ, bOpen, bNodes.add(goalState), bNodes, backwardsHeuristic(goalState,problem))
     # helper function to check if directions meet
     nodesExpanded = []
     
@@ -416,54 +806,52 @@ def findBestPath(startState, goalState, problem, heuristic=nullHeuristic, backwa
         # forward and backward expansion
         if x == 0: # forward
             # print("forward direction:")
-            currentNode = fPQ.pop()
-            fVisited.add(currentNode[0])
+            currentNode = fOpen.pop(fPQ.pop())
+            fVisited.add(fNodes.getState(currentNode))
             # check if directions meet if so update plan and upper bound
-            upperBound, currentPlan = checkMembership(currentNode, bPQ, upperBound, currentPlan, direction=x)
+            upperBound, currentPlan = checkMembership(currentNode, fNodes, bOpen, bNodes, upperBound, currentPlan, direction=x)
             # check if lower bound is greater than upper bound
             if lowerBound >= upperBound:
                 # more then one goal state
                 return currentPlan
         
             # expand node to get forward successors
-            for succ in problem.getSuccessors(currentNode[0]):
+            for succ in problem.getSuccessors(fNodes.getState(currentNode)):
                 succState, succAction, succCost = succ
                 if (succState not in fVisited):
                     # accumulated cost to reach n
-                    accCost = currentNode[2] + succCost
+                    accCost = fNodes.getCost(currentNode) + succCost
                     # dfValue = accCost - backwardsHeuristic(succState,problem) # dx(n) = gx(n) - hx_hat(n)
                     # ffValue = accCost + heuristic(succState,problem) # fx(n) = gx(n) + hx(n)
                     # bfValue = ffValue + dfValue 
                     # 2gx(n) + hx(n) - hx_hat(n)
                     bfValue = 2*accCost + (heuristic(succState,problem) - backwardsHeuristic(succState,problem))
-                    newNode = (succState, succAction, accCost, currentNode[3] + [succAction])
-                    fPQ.push(newNode, bfValue)
+                    updateFrontier(fPQ, fOpen, fNodes.add(succState, currentNode, succAction, accCost), fNodes, bfValue)
 
         # backward iteration
         elif x==1: # backward
             # print("backward direction:")
-            currentNode = bPQ.pop()
-            bVisited.add(currentNode[0])
+            currentNode = bOpen.pop(bPQ.pop())
+            bVisited.add(bNodes.getState(currentNode))
             # check if directions meet if so update plan and upper bound
-            upperBound, currentPlan = checkMembership(currentNode, fPQ, upperBound, currentPlan, direction=x)
+            upperBound, currentPlan = checkMembership(currentNode, bNodes, fOpen, fNodes, upperBound, currentPlan, direction=x)
             # check if lower bound is greater than upper bound
             if lowerBound >= upperBound:
                 # return the first plan found
                 return currentPlan
             
             # expand node to get backward successors
-            for succ in problem.getBackwardsSuccessors(currentNode[0]):
+            for succ in problem.getBackwardsSuccessors(bNodes.getState(currentNode)):
                 succState, succAction, succCost = succ
                 if (succState not in bVisited):
                     # accumulated cost to reach n
-                    accCost = currentNode[2] + succCost
+                    accCost = bNodes.getCost(currentNode) + succCost
                     # dbValue = accCost - heuristic(succState,problem) # dx(n) = gx(n) - h(n)
                     # fbValue = accCost + backwardsHeuristic(succState,problem) # fx(n) = gx(n) + hx_hat(n)
                     # bbValue = fbValue + dbValue
                     # 2gx(n) + hx_hat(n) - hx(n)
                     bbValue = 2*accCost + (backwardsHeuristic(succState,problem) - heuristic(succState,problem))
-                    newNode = (succState, succAction, accCost, currentNode[3] + [succAction])
-                    bPQ.push(newNode, bbValue)
+                    updateFrontier(bPQ, bOpen, bNodes.add(succState, currentNode, succAction, accCost), bNodes, bbValue)
         # choose direction
         x = chooseDirection(x)
     util.raiseNotDefined()
@@ -483,57 +871,730 @@ def findClosestGoalState(currentState, goalStates):
             closestGoalState = goalState
     return closestGoalState
     
-def checkMembership(currentNode, oppositePQ, upperBound, bestPlan, direction=0):
+def updateFrontier(frontier, openNodes, node, nodes, priority):
+    """
+    Add a node to one side of the bidirectional search. The frontier queues
+    every open state once and openNodes maps it to its cheapest node, so the
+    other side can look it up in O(1) when checking if the directions meet.
+    """
+    state = nodes.getState(node)
+    if state not in openNodes:
+        openNodes[state] = node
+        frontier.push(state, priority)
+    elif nodes.getCost(node) < nodes.getCost(openNodes[state]):
+        openNodes[state] = node
+        frontier.decreaseKey(state, priority)
+
+def checkMembership(currentNode, nodes, oppositeOpen, oppositeNodes, upperBound, bestPlan, direction=0):
     """Check if the frontiers have met"""
-    oppositeOpenDict = createOpenListDict(oppositePQ)
-    state, action, cost, path = currentNode
+    state, cost = nodes.getState(currentNode), nodes.getCost(currentNode)
     # check if directions meet if so update plan and upper bound
-    oppositeStateList = list(oppositeOpenDict.keys())
-    if state in oppositeStateList:
-        oppositeNode = oppositeOpenDict[state]
-        totalCost = cost + oppositeNode.cost
+    if state in oppositeOpen:
+        oppositeNode = oppositeOpen[state]
+        totalCost = cost + oppositeNodes.getCost(oppositeNode)
         # check if total cost is less than best solution
         if totalCost < upperBound:
             upperBound = totalCost
+            # only add them together with function construction
+            path, oppositePath = nodes.getPath(currentNode), oppositeNodes.getPath(oppositeNode)
             if direction == 0:
-                # backwards path
-                reversedPath = oppositeNode.path # oppositeNode.path[::-1]
-                # forwards path
-                path = path
+                # forwards path + backwards path
+                bestPlan = path + oppositePath
             else:
-                # backwards path
-                reversedPath = path # path[::-1]
-                # forwards path
-                path = oppositeNode.path
-            # only add them together with function construction
-            bestPlan = path + reversedPath # extract plan from node
+                # the opposite frontier holds the forwards path
+                bestPlan = oppositePath + path
     return upperBound, bestPlan
 
-def createOpenListDict(oppositePQ):
-    """Create a dictionary of the opposite open list"""
-    oppositeOpenDict = {}
-    for state in oppositePQ.heap:
-        newNode = Node(state[2][0], state[2][1], state[2][2], state[2][3])
-        oppositeOpenDict[state[2][0]] = newNode
-    return oppositeOpenDict
-
 def chooseDirection(x): # TODO
     """Choose the direction of the search"""
     return 1 - x # swap 0 and 1
 
-class Node(object):
-    """Node class for the bidirectional search"""
-    def __init__(self, state, action, cost, path) -> None:
-        self.state = state
-        self.action = action
-        self.cost = cost
-        self.path = path
+def givenHeuristic(heuristic):
+    return heuristic
+
+def blindHeuristic(heuristic):
+    return nullHeuristic
+
+def weightedHeuristic(weight):
+    "A heuristic variant for the portfolio that multiplies the heuristic by weight"
+    def variant(heuristic):
+        if heuristic is nullHeuristic:
+            return heuristic
+        return lambda state, problem=None: weight * heuristic(state, problem)
+    variant.__name__ = 'weightedHeuristic(%s)' % weight
+    return variant
+
+# Members of the portfolio search: an algorithm, the variant of the given
+# heuristics it runs with, and the suboptimality it guarantees for an
+# admissible heuristic
+PORTFOLIO = [(aStarSearch, givenHeuristic, 1.0),
+             (aStarSearch, blindHeuristic, 1.0),
+             (bidirectionalAStarEnhanced, givenHeuristic, 1.0),
+             (aStarSearch, weightedHeuristic(2.0), 2.0),
+             (enforcedHillClimbing, givenHeuristic, INF)]
+
+def portfolioSearch(problem, heuristic=nullHeuristic, backwardsHeuristic=nullHeuristic,
+                    suboptimality=PORTFOLIO_SUBOPTIMALITY, portfolio=None):
+    """
+    Runs the members of portfolio, PORTFOLIO unless given, whose guarantee
+    is within suboptimality at the same time, each in a worker process of
+    its own, and returns the first plan that one of them finds. The other
+    workers are terminated.
+    A member that fails on the problem, e.g. bidirectionalAStarEnhanced
+    without getBackwardsSuccessors, just drops out of the race. Members
+    that would run the same algorithm with the same heuristics, e.g. both
+    A* members when heuristic is nullHeuristic, run once.
+
+    The workers are forked so that the problem and heuristics need not be
+    picklable. The winner's problem._expanded is copied back, but its
+    expanded cells are not drawn. Under collectStatistics the statistics of
+    the members that finished are added to those of the search. Where fork
+    is not available the members are tried one after the other in this
+    process.
+    """
+    if portfolio is None:
+        portfolio = PORTFOLIO
+    members = []
+    for algorithm, variant, bound in portfolio:
+        if bound <= suboptimality:
+            member = (algorithm, variant(heuristic), variant(backwardsHeuristic), variant.__name__)
+            if member[:3] not in [other[:3] for other in members]:
+                members.append(member)
+    if not members:
+        raise Exception('No search in the portfolio guarantees a suboptimality of %s' % suboptimality)
+
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        for algorithm, heuristic, backwardsHeuristic, _ in members:
+            try:
+                return runPortfolioMember(algorithm, problem, heuristic, backwardsHeuristic)
+            except Exception:
+                continue
+        return []
+
+    context = multiprocessing.get_context('fork')
+    workers = dict() # receiving end of a pipe -> ( member, process )
+    for member in members:
+        algorithm, heuristic, backwardsHeuristic, _ = member
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=portfolioWorker, daemon=True,
+                                  args=(sender, algorithm, problem, heuristic, backwardsHeuristic))
+        process.start()
+        sender.close()
+        workers[receiver] = (member, process)
+    try:
+        while workers:
+            for receiver in wait(list(workers)):
+                member, process = workers.pop(receiver)
+                try:
+                    actions, counters, workerStats = receiver.recv()
+                except EOFError: # the worker died
+                    continue
+                finally:
+                    receiver.close()
+                mergeWorkerStatistics(problem, workerStats)
+                if actions is None: # the member failed on the problem
+                    continue
+                print('[portfolioSearch] plan found by %s (%s)' % (member[0].__name__, member[3]))
+                for name, value in counters.items():
+                    setattr(problem, name, value)
+                return actions
+    finally:
+        for member, process in workers.values():
+            process.terminate()
+        for member, process in workers.values():
+            process.join()
+    print('[portfolioSearch] no search in the portfolio found a plan')
+    return []
+
+def portfolioWorker(sender, algorithm, problem, heuristic, backwardsHeuristic):
+    "Runs one portfolio member in a forked process and sends back its plan, None if it fails"
+    if hasattr(problem, 'visualize'):
+        problem.visualize = False # the display belongs to the parent process
+    startWorkerStatistics(problem)
+    try:
+        actions = runPortfolioMember(algorithm, problem, heuristic, backwardsHeuristic)
+    except BaseException: # raiseNotDefined exits
+        actions = None
+    counters = dict((name, getattr(problem, name)) for name in ['_expanded'] if hasattr(problem, name))
+    sender.send((actions, counters, getWorkerStatistics(problem)))
+    sender.close()
+
+def runPortfolioMember(algorithm, problem, heuristic, backwardsHeuristic):
+    "Calls algorithm with whichever heuristics it takes"
+    code = algorithm.__code__
+    arguments = code.co_varnames[:code.co_argcount]
+    heuristics = {'heuristic': heuristic, 'backwardsHeuristic': backwardsHeuristic}
+    return algorithm(problem, **dict((name, h) for name, h in heuristics.items() if name in arguments))
+
+def hashDistributedAStar(problem, heuristic=nullHeuristic, workers=HDA_WORKERS, batchSize=HDA_BATCH_SIZE):
+    """
+    Hash Distributed A* (HDA*) over several worker processes. Every state
+    is owned by worker hash(state) % workers, which alone keeps its cost and
+    parent and expands it. Successors owned by other workers are collected
+    and sent to them in messages of up to batchSize nodes. The workers keep
+    to the same f layer (see HDAStarWorker) and skip nodes whose f value is
+    not below the cheapest goal found by any worker, so they expand about
+    the nodes aStarSearch would.
+
+    The search is over once every worker is idle and every message sent has
+    been received, both read under one lock. The plan is then put together
+    by asking the owners for the parent of each state from the goal back to
+    the start. With an admissible heuristic the plan is optimal.
+
+    Workers are forked, so the problem need not be picklable, only its
+    states and actions. If a worker fails its error is raised here. Under
+    collectStatistics the statistics of the workers are added up. With
+    fewer than two workers, or where fork is not available, this is
+    aStarSearch.
+    """
+    if workers < 2 or 'fork' not in multiprocessing.get_all_start_methods():
+        return aStarSearch(problem, heuristic)
+
+    context = multiprocessing.get_context('fork')
+    channels = HDAStarChannels(context, workers)
+    hdaWorkers = [HDAStarWorker(index, problem, heuristic, batchSize, channels) for index in range(workers)]
+    startState = problem.getStartState()
+    hdaWorkers[channels.owner(startState)].add(startState, 0, None, None)
+    processes = [context.Process(target=hdaWorker.run, daemon=True) for hdaWorker in hdaWorkers]
+    for process in processes:
+        process.start()
+
+    try:
+        # termination detection, keeping the goals reported by the way
+        goals = dict() # cost -> goal state
+        while True:
+            with channels.lock:
+                if all(channels.idle) and channels.sent.value == channels.received.value:
+                    break
+            receiveResult(channels, processes, goals)
+
+        goalCost = channels.goalCost.value
+        actions = []
+        if goalCost < INF:
+            # the goal of the cheapest plan, goals may be reported out of order
+            while goalCost not in goals:
+                receiveResult(channels, processes, goals)
+            state = goals[goalCost]
+            while True:
+                channels.inboxes[channels.owner(state)].put(('parent', state))
+                state, action = receiveResult(channels, processes, goals, 'parent')
+                if state is None:
+                    break
+                actions.append(action)
+            actions.reverse()
+        else:
+            print('[hashDistributedAStar] there is no plan')
+
+        expanded = 0
+        for inbox in channels.inboxes:
+            inbox.put(('stop', None))
+        for _ in range(workers):
+            workerExpanded, workerStats = receiveResult(channels, processes, goals, 'expanded')
+            expanded += workerExpanded
+            mergeWorkerStatistics(problem, workerStats)
+        if hasattr(problem, '_expanded'):
+            problem._expanded = expanded
+        return actions
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+def receiveResult(channels, processes, goals, kind=None):
+    """
+    Waits for the next message from the workers of hashDistributedAStar,
+    for at most HDA_POLL_INTERVAL unless kind is given, in which case it
+    waits for a message of that kind and returns its payload. Reported
+    goals are kept in goals. Raises the error of a worker that failed,
+    and an Exception if a worker process ended without reporting one.
+    """
+    while True:
+        try:
+            messageKind, payload = channels.results.get(timeout=HDA_POLL_INTERVAL)
+        except Empty:
+            if any(process.exitcode not in (None, 0) for process in processes):
+                try:
+                    # its error may still be on the way
+                    messageKind, payload = channels.results.get(timeout=1.0)
+                except Empty:
+                    exitcodes = [process.exitcode for process in processes]
+                    raise Exception('[hashDistributedAStar] a worker ended unexpectedly, exit codes %s' % exitcodes)
+            elif kind is None:
+                return None
+            else:
+                continue
+        if messageKind == 'error':
+            error, trace = payload
+            raise error from Exception('in a worker of hashDistributedAStar:\n' + trace)
+        if messageKind == 'goal':
+            cost, state = payload
+            goals[cost] = state
+        if kind is None or messageKind == kind:
+            return payload
+
+class HDAStarChannels:
+    """
+    What the processes of hashDistributedAStar share: one inbox per worker,
+    a results queue read by the parent, the counters for termination
+    detection and the cost of the cheapest goal found so far. For every
+    worker there is also the lowest f value in its queue (INF when it has
+    no work), and for the messages of nodes still on the way to it their
+    number and a lower bound on their f values, the f of their parents.
+    """
+    def __init__(self, context, workers):
+        self.lock = context.Lock()
+        self.inboxes = [context.Queue() for _ in range(workers)]
+        self.results = context.Queue()
+        self.sent = context.RawValue('q', 0) # messages of nodes sent
+        self.received = context.RawValue('q', 0) # and received by now
+        self.idle = context.RawArray('b', workers)
+        self.goalCost = context.RawValue('d', INF)
+        self.frontier = context.RawArray('d', [INF] * workers)
+        self.sentTo = context.RawArray('q', workers)
+        self.receivedBy = context.RawArray('q', workers)
+        self.pending = context.RawArray('d', [INF] * workers)
+
+    def owner(self, state):
+        return hash(state) % len(self.inboxes)
+
+class HDAStarWorker:
+    """
+    A* over the states one worker of hashDistributedAStar owns.
+
+    A worker only expands nodes whose f value is no higher than the lowest
+    one the other workers have published, so that the workers go through
+    the f layers together, as A* does, instead of one of them running
+    ahead through nodes A* would never expand. The workers still expand
+    the nodes of one layer in parallel.
+    """
+
+    def __init__(self, index, problem, heuristic, batchSize, channels):
+        self.index = index
+        self.problem = problem
+        self.heuristic = heuristic
+        self.batchSize = batchSize
+        self.channels = channels
+        self.myPQ = getContainers(problem).BucketPriorityQueue()
+        self.best = dict() # owned state -> ( cost, parent state, action ) of its cheapest path
+        self.outboxes = [[] for _ in channels.inboxes]
+        self.outboxFloors = [INF for _ in channels.inboxes] # lowest f of the parents of the nodes in each outbox
+        self.expanded = 0
+
+    def run(self):
+        if hasattr(self.problem, 'visualize'):
+            self.problem.visualize = False # the display belongs to the parent process
+        startWorkerStatistics(self.problem)
+        try:
+            self.search()
+        except BaseException as error:
+            try:
+                pickle.dumps(error)
+            except Exception:
+                error = Exception(repr(error))
+            self.channels.results.put(('error', (error, traceback.format_exc())))
+            sys.exit(1)
+
+    def search(self):
+        while True:
+            if self.hasWork():
+                self.receive(block=False)
+                self.publish()
+                if self.myPQ.getMinimumPriority() <= self.getBound():
+                    self.expand()
+                    self.send()
+                    self.publish()
+                else:
+                    # wait for the others to catch up with this layer
+                    self.receive(block=True, timeout=HDA_POLL_INTERVAL)
+            else:
+                with self.channels.lock:
+                    self.channels.idle[self.index] = 1
+                self.publish()
+                if not self.receive(block=True):
+                    return
+
+    def publish(self):
+        "Publishes the lowest f value this worker has work for"
+        self.channels.frontier[self.index] = self.myPQ.getMinimumPriority() if self.hasWork() else INF
+
+    def getBound(self):
+        "Returns the lowest f value the other workers have work for, or that is on the way to any worker"
+        channels = self.channels
+        bound = channels.pending[self.index]
+        for index in range(len(channels.inboxes)):
+            if index != self.index:
+                bound = min(bound, channels.frontier[index], channels.pending[index])
+        return bound
+
+    def hasWork(self):
+        return not self.myPQ.isEmpty() and self.myPQ.getMinimumPriority() < self.channels.goalCost.value
+
+    def add(self, state, cost, parent, action):
+        if state in self.best and self.best[state][0] <= cost:
+            return
+        self.best[state] = (cost, parent, action)
+        f = cost + self.heuristic(state, self.problem)
+        if state in self.myPQ:
+            self.myPQ.decreaseKey(state, f)
+        else:
+            self.myPQ.push(state, f)
+
+    def expand(self):
+        """
+        Expands up to batchSize states within the bound of the other workers,
+        keeping successors owned by other workers for send. The nodes kept
+        for them bound the batch as well, the others cannot see them yet.
+        """
+        channels = self.channels
+        bound = self.getBound()
+        for _ in range(self.batchSize):
+            if not self.hasWork() or self.myPQ.getMinimumPriority() > min(bound, min(self.outboxFloors)):
+                return
+            f = self.myPQ.getMinimumPriority()
+            state = self.myPQ.pop()
+            cost = self.best[state][0]
+            if self.problem.isGoalState(state): # only the start state, the others are caught below
+                self.reportGoal(state, cost)
+                continue
+            self.expanded += 1
+            for succState, succAction, succCost in self.problem.getSuccessors(state):
+                # a goal bounds the search as soon as it is generated, else the
+                # workers go on through the last f layer until its owner pops it
+                if self.problem.isGoalState(succState):
+                    self.reportGoal(succState, cost + succCost)
+                owner = channels.owner(succState)
+                if owner == self.index:
+                    self.add(succState, cost + succCost, state, succAction)
+                else:
+                    self.outboxes[owner].append((succState, cost + succCost, state, succAction))
+                    self.outboxFloors[owner] = min(self.outboxFloors[owner], f)
+
+    def reportGoal(self, state, cost):
+        channels = self.channels
+        with channels.lock:
+            if cost < channels.goalCost.value:
+                channels.goalCost.value = cost
+                channels.results.put(('goal', (cost, state)))
+
+    def send(self):
+        channels = self.channels
+        for owner, nodes in enumerate(self.outboxes):
+            if nodes:
+                with channels.lock:
+                    channels.sent.value += 1
+                    channels.sentTo[owner] += 1
+                    channels.pending[owner] = min(channels.pending[owner], self.outboxFloors[owner])
+                channels.inboxes[owner].put(('nodes', nodes))
+                self.outboxes[owner] = []
+                self.outboxFloors[owner] = INF
+
+    def receive(self, block, timeout=None):
+        """
+        Handles the messages in the inbox, waiting for the first one if block
+        is set, for at most timeout seconds if given. Returns False once the
+        worker is told to stop.
+        """
+        channels = self.channels
+        while True:
+            try:
+                kind, payload = channels.inboxes[self.index].get(block, timeout)
+            except Empty:
+                return True
+            if kind == 'nodes':
+                for node in payload:
+                    self.add(*node)
+                with channels.lock:
+                    channels.idle[self.index] = 0
+                    channels.received.value += 1
+                    channels.receivedBy[self.index] += 1
+                    if channels.receivedBy[self.index] == channels.sentTo[self.index]:
+                        # all nodes sent here are in the queue now
+                        channels.pending[self.index] = INF
+                    self.publish()
+                block = False
+            elif kind == 'parent':
+                channels.results.put(('parent', self.best[payload][1:]))
+            else:
+                channels.results.put(('expanded', (self.expanded, getWorkerStatistics(self.problem))))
+                return False
+
+class SearchStatistics:
+    """
+    Counters and timings of one search, filled in by collectStatistics.
+
+    expanded counts getSuccessors calls and reopened those for a state that
+    had been expanded before; distinct is the number of distinct states
+    expanded. peakFrontier is the largest size any queue reached and
+    peakClosed the largest number of states in the closed lists of the
+    search (util.ClosedSet and util.ClosedTable) at one time, so it is 0
+    for a search without one, like iterativeDeepeningAStar.
+    Times are in seconds; otherTime is whatever the search spent outside
+    successor generation, heuristics, goal tests and queue operations.
+
+    Searches that fork worker processes, portfolioSearch and
+    hashDistributedAStar, send the statistics of their workers back and
+    they are added up with merge; see startWorkerStatistics. The peaks are
+    then summed over the processes, which run at the same time, and the
+    times are those of all processes together, so they can exceed
+    totalTime. Members of a portfolio that are still running when another
+    one wins are terminated and not counted.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        "Resets every counter, in place: the instrumented queues and heuristics keep a reference"
+        self.generated = 0
+        self.expanded = 0
+        self.reopened = 0
+        self.distinct = 0
+        self.goalTests = 0
+        self.heuristicCalls = 0
+        self.queueOperations = 0
+        self.peakFrontier = 0
+        self.peakClosed = 0
+        self.workers = 0
+        self.successorTime = 0.0
+        self.heuristicTime = 0.0
+        self.goalTestTime = 0.0
+        self.queueTime = 0.0
+        self.totalTime = 0.0
+        self.solutionCost = None
+        self.solutionLength = None
+        self._inQueueOperation = False
+
+    def getOtherTime(self):
+        return self.totalTime - self.successorTime - self.heuristicTime - self.goalTestTime - self.queueTime
+
+    def merge(self, other):
+        "Adds the statistics other of a worker process to these"
+        for name in ['generated', 'expanded', 'reopened', 'distinct', 'goalTests', 'heuristicCalls',
+                     'queueOperations', 'peakFrontier', 'peakClosed', 'successorTime', 'heuristicTime',
+                     'goalTestTime', 'queueTime']:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.workers += 1 + other.workers
+
+    def __str__(self):
+        lines = ['Search statistics:',
+                 '  nodes generated:    %d' % self.generated,
+                 '  nodes expanded:     %d (%d re-opened, %d distinct)' % (self.expanded, self.reopened, self.distinct),
+                 '  peak frontier size: %d' % self.peakFrontier,
+                 '  peak closed size:   %d' % self.peakClosed,
+                 '  goal tests:         %d' % self.goalTests,
+                 '  heuristic calls:    %d' % self.heuristicCalls,
+                 '  queue operations:   %d' % self.queueOperations]
+        for name, seconds in [('successors', self.successorTime), ('heuristic', self.heuristicTime),
+                              ('goal tests', self.goalTestTime), ('queue', self.queueTime),
+                              ('other', self.getOtherTime()), ('total', self.totalTime)]:
+            lines.append('  %-19s %.4fs' % (name + ' time:', seconds))
+        if self.workers:
+            lines.append('  (counted over %d worker processes as well)' % self.workers)
+        if self.solutionCost is not None:
+            lines.append('  solution cost:      %s (%d actions)' % (self.solutionCost, self.solutionLength))
+        return '\n'.join(lines)
+
+class InstrumentedProblem:
+    """
+    Forwards every call to a search problem, counting and timing the
+    expansions and goal tests in a SearchStatistics. Attribute reads and
+    writes also go to the wrapped problem, so heuristics and the display
+    bookkeeping see it unchanged. The searches take their queues and
+    closed lists from its containers, see getContainers.
+    """
+
+    def __init__(self, problem, stats):
+        object.__setattr__(self, 'problem', problem)
+        object.__setattr__(self, 'stats', stats)
+        object.__setattr__(self, 'expandedStates', set())
+        object.__setattr__(self, 'containers', InstrumentedContainers(stats))
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.problem, name, value)
+
+    def getStartState(self):
+        return self.problem.getStartState()
+
+    def isGoalState(self, state):
+        start = time.perf_counter()
+        isGoal = self.problem.isGoalState(state)
+        self.stats.goalTestTime += time.perf_counter() - start
+        self.stats.goalTests += 1
+        return isGoal
+
+    def getSuccessors(self, state):
+        return self.expand(self.problem.getSuccessors, state)
+
+    def getBackwardsSuccessors(self, state):
+        return self.expand(self.problem.getBackwardsSuccessors, state)
+
+    def expand(self, getSuccessors, state):
+        start = time.perf_counter()
+        successors = getSuccessors(state)
+        stats = self.stats
+        stats.successorTime += time.perf_counter() - start
+        stats.expanded += 1
+        stats.generated += len(successors)
+        if state in self.expandedStates:
+            stats.reopened += 1
+        else:
+            self.expandedStates.add(state)
+        return successors
+
+class InstrumentedContainers:
+    """
+    The queues and closed lists of utils.util, as subclasses that record in
+    a SearchStatistics the time of their operations or their size. Each
+    InstrumentedProblem has its own, so utils.util itself is never changed.
+    """
+
+    def __init__(self, stats):
+        closedLists = weakref.WeakValueDictionary() # id -> a closed list the search still holds
+        for name in CONTAINERS:
+            utilClass = getattr(util, name)
+            if name.startswith('Closed'):
+                setattr(self, name, instrumentClosedList(utilClass, stats, closedLists))
+            else:
+                setattr(self, name, instrumentQueue(utilClass, stats))
+
+def getContainers(problem):
+    """
+    Where a search of problem takes its queues and closed lists from:
+    utils.util, or the InstrumentedContainers of an InstrumentedProblem.
+    """
+    if isinstance(problem, InstrumentedProblem):
+        return problem.containers
+    return util
+
+def collectStatistics(searchFunction, problem, heuristics=None):
+    """
+    Runs searchFunction(problem, **heuristics) and returns the plan together
+    with a SearchStatistics of the run, e.g.
+
+      plan, stats = collectStatistics(aStarSearch, problem, {'heuristic': h})
+
+    The search gets an InstrumentedProblem, whose queues and closed lists
+    time their operations or measure their size, so this costs some speed
+    and is meant for finding hot spots, not for benchmarks.
+    """
+    stats = SearchStatistics()
+    instrumented = InstrumentedProblem(problem, stats)
+    timedHeuristics = dict((name, timedHeuristic(heuristic, stats)) for name, heuristic in (heuristics or {}).items())
+    start = time.perf_counter()
+    plan = searchFunction(instrumented, **timedHeuristics)
+    stats.totalTime = time.perf_counter() - start
+    stats.distinct += len(instrumented.expandedStates)
+    if plan is not None:
+        stats.solutionCost = problem.getCostOfActions(plan)
+        stats.solutionLength = len(plan)
+    return plan, stats
+
+def startWorkerStatistics(problem):
+    """
+    Called by a worker process that a search forks, before it searches. If
+    problem is instrumented by collectStatistics, the counters the worker
+    inherited from its parent are cleared, so that what getWorkerStatistics
+    returns at the end can be added to the parent's with mergeWorkerStatistics.
+    """
+    if isinstance(problem, InstrumentedProblem):
+        problem.stats.clear()
+        problem.expandedStates.clear()
+
+def getWorkerStatistics(problem):
+    "Returns the SearchStatistics of a worker process, None unless problem is instrumented"
+    if not isinstance(problem, InstrumentedProblem):
+        return None
+    problem.stats.distinct = len(problem.expandedStates)
+    return problem.stats
+
+def mergeWorkerStatistics(problem, workerStats):
+    "Adds the statistics a worker returned from getWorkerStatistics to those of problem"
+    if workerStats is not None and isinstance(problem, InstrumentedProblem):
+        problem.stats.merge(workerStats)
+
+def timedHeuristic(heuristic, stats):
+    def timed(state, problem=None):
+        start = time.perf_counter()
+        value = heuristic(state, problem)
+        stats.heuristicTime += time.perf_counter() - start
+        stats.heuristicCalls += 1
+        return value
+    return timed
+
+def instrumentQueue(queueClass, stats):
+    """Returns a subclass of a util queue that records its operations in stats"""
+    class InstrumentedQueue(queueClass):
+        pass
+    for name in ['push', 'pushMany', 'pop', 'update', 'decreaseKey', 'remove']:
+        if hasattr(queueClass, name):
+            setattr(InstrumentedQueue, name, timedQueueOperation(getattr(queueClass, name), stats))
+    InstrumentedQueue.__name__ = queueClass.__name__
+    return InstrumentedQueue
+
+def instrumentClosedList(closedClass, stats, closedLists):
+    """
+    Returns a subclass of util.ClosedSet or util.ClosedTable that records in
+    stats the largest number of states held by the closed lists in
+    closedLists, which its instances join by id, at one time
+    """
+    class InstrumentedClosedList(closedClass):
+        def __init__(self, *args):
+            closedClass.__init__(self, *args)
+            closedLists[id(self)] = self
+            self.recordSize()
+
+        def recordSize(self):
+            size = sum(len(closedList) for closedList in closedLists.values())
+            if size > stats.peakClosed:
+                stats.peakClosed = size
+
+    for name in ['add', '__setitem__']:
+        if hasattr(closedClass, name):
+            setattr(InstrumentedClosedList, name, sizedClosedListOperation(getattr(closedClass, name)))
+    InstrumentedClosedList.__name__ = closedClass.__name__
+    return InstrumentedClosedList
+
+def sizedClosedListOperation(operation):
+    def sized(closedList, *args):
+        size = len(closedList)
+        operation(closedList, *args)
+        if len(closedList) > size:
+            closedList.recordSize()
+    return sized
+
+def timedQueueOperation(operation, stats):
+    # A queue that delegates to another one, like BucketPriorityQueue after
+    # it falls back to a heap, is only counted once per operation.
+    def timed(queue, *args):
+        if stats._inQueueOperation:
+            return operation(queue, *args)
+        stats._inQueueOperation = True
+        start = time.perf_counter()
+        try:
+            return operation(queue, *args)
+        finally:
+            stats.queueTime += time.perf_counter() - start
+            stats.queueOperations += 1
+            stats._inQueueOperation = False
+            if len(queue) > stats.peakFrontier:
+                stats.peakFrontier = len(queue)
+    return timed
 
 # Abbreviations
 bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+jps = jumpPointSearch
+idastar = iterativeDeepeningAStar
+iddfs = iterativeDeepeningSearch
+arastar = anytimeAStarSearch
+portfolio = portfolioSearch
+hdastar = hashDistributedAStar
 
 ehc = enforcedHillClimbing
 bae = bidirectionalAStarEnhanced
\ No newline at end of file
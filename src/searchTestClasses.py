@@ -11,14 +11,20 @@
 # Pieter Abbeel (pabbeel@cs.berkeley.edu).
 
 import sys
+import os
 import re
+import shutil
+import tempfile
 import testClasses
 import textwrap
 import datetime
+import random
 
 # import project specific code
+import game
 import layout
 import pacman
+import textDisplay
 from search import SearchProblem
 
 DEFAULT_TIMEOUT = 180
@@ -366,6 +372,902 @@ class PacmanSearchTest(testClasses.TestCase):
         return True
 
 
+class SearchStatisticsTest(testClasses.TestCase):
+    """
+    Runs algorithm under search.collectStatistics on a pacman search problem
+    and checks the SearchStatistics against the solution file: the nodes
+    expanded, the distinct states expanded, the goal tests, the peak size
+    of the closed lists and the solution cost. The nodes expanded must also
+    agree with the problem's own count, and the classes of util must be
+    unchanged afterwards.
+    """
+
+    COUNTERS = [('expanded', 'expanded'), ('distinct', 'distinct'), ('goal_tests', 'goalTests'),
+                ('peak_closed', 'peakClosed'), ('solution_cost', 'solutionCost')]
+
+    def __init__(self, question, testDict):
+        super(SearchStatisticsTest, self).__init__(question, testDict)
+        self.layout_text = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.alg = testDict['algorithm']
+        self.searchProblemClassName = testDict.get('searchProblemClass', 'PositionSearchProblem')
+        self.heuristicName = testDict.get('heuristic', None)
+
+    def getStatistics(self, search, searchAgents):
+        "Returns the SearchStatistics of the run and an error message, or None"
+        lay = layout.Layout([l.strip() for l in self.layout_text.split('\n')])
+        start_state = pacman.GameState()
+        start_state.initialize(lay, 0)
+        problem = getattr(searchAgents, self.searchProblemClassName)(start_state)
+        heuristics = None
+        if self.heuristicName != None:
+            heuristics = {'heuristic': getattr(searchAgents, self.heuristicName)}
+
+        utilClasses = [getattr(search.util, name) for name in search.CONTAINERS]
+        plan, stats = search.collectStatistics(getattr(search, self.alg), problem, heuristics)
+        error = None
+        if [getattr(search.util, name) for name in search.CONTAINERS] != utilClasses:
+            error = 'collectStatistics left classes of util replaced.'
+        elif stats.expanded != problem._expanded:
+            error = 'The statistics count %s nodes expanded, the problem %s.' % (stats.expanded, problem._expanded)
+        return stats, error
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        stats, error = self.getStatistics(search, searchAgents)
+        for key, name in self.COUNTERS:
+            if error != None:
+                break
+            if str(getattr(stats, name)) != solutionDict[key]:
+                error = '%s is %s, correct %s.' % (name, getattr(stats, name), solutionDict[key])
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tnodes expanded:\t\t%s' % stats.expanded)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        stats, error = self.getStatistics(moduleDict['search'], moduleDict['searchAgents'])
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The SearchStatistics of the search.\n')
+        for key, name in self.COUNTERS:
+            handle.write('%s: "%s"\n' % (key, getattr(stats, name)))
+        handle.close()
+        return True
+
+class PacmanSearchComparisonTest(testClasses.TestCase):
+    """
+    Runs a search algorithm and a reference algorithm (aStarSearch unless
+    referenceAlgorithm is given) on the same pacman search problem. Both
+    plans must reach the goal at the cost in the solution file, and the
+    algorithm must not expand more nodes than recorded there, nor as many
+    as the reference when fewerExpansions is set. checkExpanded: "False"
+    skips the expansion checks, e.g. for searches that run in parallel.
+
+    With suboptimality set, the plan of the algorithm may cost up to that
+    many times the cost in the solution file, e.g. for anytime searches
+    stopped early.
+
+    The reference runs on referenceSearchProblemClass with referenceHeuristic
+    if given, e.g. to compare two encodings of a problem. heuristicAdapter
+    names a function of searchAgents that wraps the algorithm's heuristic,
+    and searchWrapper one that runs the algorithm, given as a function of
+    the problem, on a problem of its own, like corridorSearch.
+    referenceQueue names a queue of util that the reference uses wherever
+    the search creates a util.BucketPriorityQueue, and with sameExpansions
+    the algorithm must expand exactly as many nodes as the reference.
+    """
+
+    def __init__(self, question, testDict):
+        super(PacmanSearchComparisonTest, self).__init__(question, testDict)
+        self.layout_text = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.alg = testDict['algorithm']
+        self.referenceAlg = testDict.get('referenceAlgorithm', 'aStarSearch')
+        self.algArgs = eval('dict(%s)' % testDict.get('algorithmArgs', ''))
+        self.costFn = eval(testDict.get('costFn', 'None'))
+        self.searchProblemClassName = testDict.get('searchProblemClass', 'PositionSearchProblem')
+        self.heuristicName = testDict.get('heuristic', None)
+        self.heuristicAdapterName = testDict.get('heuristicAdapter', None)
+        self.searchWrapperName = testDict.get('searchWrapper', None)
+        self.referenceSearchProblemClassName = testDict.get('referenceSearchProblemClass', self.searchProblemClassName)
+        self.referenceHeuristicName = testDict.get('referenceHeuristic', self.heuristicName)
+        self.fewerExpansions = testDict.get('fewerExpansions', 'False').lower() == 'true'
+        self.checkExpanded = testDict.get('checkExpanded', 'True').lower() == 'true'
+        self.suboptimality = float(testDict.get('suboptimality', '1'))
+        self.referenceQueueName = testDict.get('referenceQueue', None)
+        self.sameExpansions = testDict.get('sameExpansions', 'False').lower() == 'true'
+
+    def getSolInfo(self, search, searchAgents, algName, algArgs, problemClassName, heuristicName, adapterName=None,
+                   wrapperName=None, queueName=None):
+        "Returns the cost of the plan of algName, the nodes it expanded and whether it reaches the goal"
+        lay = layout.Layout([l.strip() for l in self.layout_text.split('\n')])
+        start_state = pacman.GameState()
+        start_state.initialize(lay, 0)
+
+        problemClass = getattr(searchAgents, problemClassName)
+        problemOptions = {}
+        if self.costFn != None:
+            problemOptions['costFn'] = self.costFn
+        problem = problemClass(start_state, **problemOptions)
+        algArgs = dict(algArgs)
+        if heuristicName != None:
+            algArgs['heuristic'] = getattr(searchAgents, heuristicName)
+            if adapterName != None:
+                algArgs['heuristic'] = getattr(searchAgents, adapterName)(algArgs['heuristic'])
+
+        bucketQueue = search.util.BucketPriorityQueue
+        if queueName != None:
+            search.util.BucketPriorityQueue = getattr(search.util, queueName)
+        searchFunction = lambda problem: getattr(search, algName)(problem, **algArgs)
+        try:
+            if wrapperName != None:
+                solution = getattr(searchAgents, wrapperName)(problem, searchFunction)
+            else:
+                solution = searchFunction(problem)
+        finally:
+            search.util.BucketPriorityQueue = bucketQueue
+        if type(solution) != type([]):
+            raise Exception('The result of %s must be a list. (Instead, it is %s)' % (algName, type(solution)))
+        expanded = problem._expanded
+        return problem.getCostOfActions(solution), expanded, checkSolution(problem, solution)
+
+    def getBothSolInfo(self, search, searchAgents):
+        "Returns the solution info of the algorithm followed by that of the reference"
+        return (self.getSolInfo(search, searchAgents, self.alg, self.algArgs, self.searchProblemClassName,
+                                self.heuristicName, self.heuristicAdapterName, self.searchWrapperName) +
+                self.getSolInfo(search, searchAgents, self.referenceAlg, {}, self.referenceSearchProblemClassName,
+                                self.referenceHeuristicName, queueName=self.referenceQueueName))
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_cost = float(solutionDict['solution_cost'])
+        gold_expanded = int(solutionDict['expanded_nodes'])
+
+        cost, expanded, reachesGoal, refCost, refExpanded, refReachesGoal = self.getBothSolInfo(search, searchAgents)
+
+        error = None
+        if not reachesGoal or not refReachesGoal:
+            error = 'The plan does not reach the goal.'
+        elif abs(refCost - gold_cost) > 1e-6:
+            error = '%s plan cost %s, correct cost %s.' % (self.referenceAlg, refCost, gold_cost)
+        elif cost < gold_cost - 1e-6 or cost > self.suboptimality * gold_cost + 1e-6:
+            error = 'Plan cost %s, correct cost %s, allowed up to %s times that.' % (cost, gold_cost, self.suboptimality)
+        elif self.checkExpanded and expanded > gold_expanded:
+            error = 'Too many nodes expanded: %s, correct nodes expanded: %s.' % (expanded, gold_expanded)
+        elif self.checkExpanded and self.sameExpansions and expanded != refExpanded:
+            error = '%s expanded %s nodes, %s expanded %s.' % (self.alg, expanded, self.referenceAlg, refExpanded)
+        elif self.checkExpanded and self.fewerExpansions and expanded >= refExpanded:
+            error = '%s expanded %s nodes, no fewer than the %s of %s.' % (self.alg, expanded, refExpanded, self.referenceAlg)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsolution cost:\t\t%s' % cost)
+        grades.addMessage('\tnodes expanded:\t\t%s (%s: %s)' % (expanded, self.referenceAlg, refExpanded))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        cost, expanded, reachesGoal, refCost, refExpanded, refReachesGoal = self.getBothSolInfo(search, searchAgents)
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# %s expanded %s nodes.\n' % (self.referenceAlg, refExpanded))
+        handle.write('solution_cost: "%s"\n' % refCost)
+        handle.write('expanded_nodes: "%s"\n' % expanded)
+        handle.close()
+        return True
+
+
+class PathQueryTest(testClasses.TestCase):
+    """
+    Runs searchAgents.findPaths on a query from each of starts (positions,
+    Pacman's by default) to each food cell of the layout. Every query must
+    be answered once, with the path breadthFirstSearch returns on the
+    PositionSearchProblem from start to goal, or None where there is no
+    path. The lengths of all paths must add up to total_length.
+    """
+
+    def __init__(self, question, testDict):
+        super(PathQueryTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.starts = eval(testDict.get('starts', 'None'))
+
+    def getQueries(self):
+        "Returns the start state and the ( start, goal ) queries"
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        starts = self.starts or [gameState.getPacmanPosition()]
+        return gameState, [(start, goal) for start in starts for goal in lay.food.asList()]
+
+    def getReference(self, search, searchAgents, gameState, start, goal):
+        "The path of breadthFirstSearch from start to goal, None if it finds none"
+        problem = searchAgents.PositionSearchProblem(gameState, goal=goal, start=start, warn=False, visualize=False)
+        path = search.breadthFirstSearch(problem)
+        if start != goal and not path:
+            return None
+        return path
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_length = int(solutionDict['total_length'])
+        gameState, queries = self.getQueries()
+
+        answers = dict()
+        for start, goal, actions in searchAgents.findPaths(gameState, queries):
+            answers.setdefault((start, goal), []).append(actions)
+
+        error = None
+        totalLength = 0
+        for query in queries:
+            if len(answers.get(query, [])) != 1:
+                error = 'Query %s -> %s answered %s times.' % (query + (len(answers.get(query, [])),))
+                break
+            actions = answers[query][0]
+            reference = self.getReference(search, searchAgents, gameState, *query)
+            if actions != reference:
+                error = 'Path %s -> %s is %s, breadthFirstSearch found %s.' % (query + (actions, reference))
+                break
+            totalLength += len(actions or [])
+        if error == None and totalLength != gold_length:
+            error = 'Paths of total length %s, correct total length %s.' % (totalLength, gold_length)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tqueries:\t\t%s' % len(queries))
+        grades.addMessage('\ttotal length:\t\t%s' % totalLength)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gameState, queries = self.getQueries()
+        totalLength = sum([len(self.getReference(search, searchAgents, gameState, *query) or [])
+                           for query in queries])
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# breadthFirstSearch answered %s queries.\n' % len(queries))
+        handle.write('total_length: "%s"\n' % totalLength)
+        handle.close()
+        return True
+
+
+class MazeDistancesTest(testClasses.TestCase):
+    """
+    Checks the layout.MazeDistances table of a maze: the distance from each
+    of sources (every open cell by default) to every open cell must be the
+    length of the breadthFirstSearch path between them, -1 where there is
+    none, and the finite distances must add up to total_distance.
+    searchAgents.mazeDistance must agree, with 0 where there is no path.
+
+    With cacheFile set the table is built into a .npy file of a fresh
+    directory and loaded back from it, which must leave nothing else behind.
+    """
+
+    def __init__(self, question, testDict):
+        super(MazeDistancesTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.sources = eval(testDict.get('sources', 'None'))
+        self.cacheFile = testDict.get('cacheFile', 'False') == 'True'
+
+    def getGameState(self):
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        return gameState
+
+    def getReference(self, search, searchAgents, gameState, start, goal):
+        "The length of the breadthFirstSearch path from start to goal, -1 if it finds none"
+        problem = searchAgents.PositionSearchProblem(gameState, goal=goal, start=start, warn=False, visualize=False)
+        path = search.breadthFirstSearch(problem)
+        if start != goal and not path:
+            return -1
+        return len(path)
+
+    def getTotal(self, distances, sources):
+        return sum([distances.getDistance(source, cell)
+                    for source in sources for cell in distances.cells
+                    if distances.getDistance(source, cell) >= 0])
+
+    def checkDistances(self, search, searchAgents, gameState, distances):
+        "Returns an error message, or None if the table agrees with breadthFirstSearch"
+        cells = gameState.getWalls().asList(False)
+        if sorted(distances.cells) != sorted(cells):
+            return 'Table covers %s cells, the maze has %s open cells.' % (len(distances.cells), len(cells))
+        for source in self.sources or cells:
+            row = distances.getDistancesFrom(source)
+            for cell in cells:
+                distance = distances.getDistance(source, cell)
+                reference = self.getReference(search, searchAgents, gameState, source, cell)
+                if distance != reference:
+                    return 'Distance %s -> %s is %s, breadthFirstSearch found %s.' % (source, cell, distance, reference)
+                if row[distances.getCellId(cell)] != distance:
+                    return 'Row of %s disagrees with the distance to %s.' % (source, cell)
+                mazeDistance = searchAgents.mazeDistance(source, cell, gameState)
+                if mazeDistance != max(reference, 0):
+                    return 'mazeDistance%s is %s, correct %s.' % ((source, cell), mazeDistance, max(reference, 0))
+        return None
+
+    def getCachedDistances(self, gameState):
+        "Returns the table loaded back from its cache file and an error message or None"
+        directory = tempfile.mkdtemp()
+        try:
+            cacheFile = os.path.join(directory, 'distances.npy')
+            built = layout.MazeDistances(gameState.getWalls(), cacheFile)
+            if os.listdir(directory) != ['distances.npy']:
+                return built, 'Building the table left %s in the cache directory.' % sorted(os.listdir(directory))
+            loaded = layout.MazeDistances(gameState.getWalls(), cacheFile)
+            if loaded.distances.tolist() != built.distances.tolist():
+                return loaded, 'The table loaded from the cache differs from the one built.'
+            return loaded, None
+        finally:
+            shutil.rmtree(directory)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_total = int(solutionDict['total_distance'])
+        gameState = self.getGameState()
+        if self.cacheFile:
+            distances, error = self.getCachedDistances(gameState)
+        else:
+            distances, error = layout.MazeDistances(gameState.getWalls()), None
+        sources = self.sources or distances.cells
+
+        if error == None:
+            error = self.checkDistances(search, searchAgents, gameState, distances)
+        if error == None and self.getTotal(distances, sources) != gold_total:
+            error = 'Distances add up to %s, correct total %s.' % (self.getTotal(distances, sources), gold_total)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsources:\t\t%s' % len(sources))
+        grades.addMessage('\ttotal distance:\t\t%s' % gold_total)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gameState = self.getGameState()
+        cells = gameState.getWalls().asList(False)
+        total = 0
+        for source in self.sources or cells:
+            for cell in cells:
+                total += max(0, self.getReference(search, searchAgents, gameState, source, cell))
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# Sum of the breadthFirstSearch path lengths between the cells.\n')
+        handle.write('total_distance: "%s"\n' % total)
+        handle.close()
+        return True
+
+
+class PriorityQueueTest(testClasses.TestCase):
+    """
+    Pushes items with the given priorities into each of the utils.util
+    queues named in queues and pops them all; they must leave in the order
+    order. Popping, or asking for the minimum priority, of a new queue and
+    of one that has just been emptied must raise an IndexError, within
+    timeout seconds.
+    """
+
+    def __init__(self, question, testDict):
+        super(PriorityQueueTest, self).__init__(question, testDict)
+        self.queues = testDict['queues'].split()
+        self.priorities = eval(testDict['priorities'])
+        self.timeout = float(testDict.get('timeout', '5'))
+
+    def checkEmpty(self, queue):
+        "Returns an error message, or None if every read of the empty queue raises an IndexError"
+        for name in ['pop', 'getMinimumPriority']:
+            try:
+                value = func_timeout(self.timeout, getattr(queue, name))
+            except IndexError:
+                continue
+            except FunctionTimedOut:
+                return '%s of the empty queue did not return within %s seconds.' % (name, self.timeout)
+            return '%s of the empty queue returned %s instead of raising an IndexError.' % (name, value)
+        return None
+
+    def getOrder(self, queue):
+        for item, priority in enumerate(self.priorities):
+            queue.push(item, priority)
+        return [queue.pop() for _ in self.priorities]
+
+    def execute(self, grades, moduleDict, solutionDict):
+        util = moduleDict['search'].util
+        gold_order = eval(solutionDict['order'])
+        error = None
+        for name in self.queues:
+            queue = getattr(util, name)()
+            error = self.checkEmpty(queue)
+            if error == None:
+                order = self.getOrder(queue)
+                if order != gold_order:
+                    error = 'The items left in the order %s, correct order %s.' % (order, gold_order)
+            if error == None:
+                error = self.checkEmpty(queue)
+            if error != None:
+                error = '%s: %s' % (name, error)
+                break
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tqueues:\t\t\t%s' % ' '.join(self.queues))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        util = moduleDict['search'].util
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The order in which an IndexedPriorityQueue pops the items.\n')
+        handle.write('order: "%s"\n' % self.getOrder(util.IndexedPriorityQueue()))
+        handle.close()
+        return True
+
+
+class BitGridTest(testClasses.TestCase):
+    """
+    Loads the layout with and without bitboard and checks that the food of
+    the game.BitGrid and of the Grid agree on asList, count, hash, equality
+    and packBits, and so do the walls copied into a BitGrid. The food is
+    then eaten a cell at a time, both through grid[x][y] and copyWith, and
+    compared again after every cell. The packed food must be packed_food.
+    """
+
+    def __init__(self, question, testDict):
+        super(BitGridTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+
+    def getLayout(self, bitboard):
+        return layout.Layout([l.strip() for l in self.layoutText.split('\n')], bitboard)
+
+    def compare(self, grid, bitGrid):
+        "Returns an error message, or None if the grids agree"
+        for name, function in [('asList()', lambda g: g.asList()), ('asList(False)', lambda g: g.asList(False)),
+                               ('count()', lambda g: g.count()), ('count(False)', lambda g: g.count(False)),
+                               ('hash', hash), ('packBits', lambda g: g.packBits())]:
+            if function(grid) != function(bitGrid):
+                return '%s of the Grid is %s, of the BitGrid %s.' % (name, function(grid), function(bitGrid))
+        if not (grid == bitGrid and bitGrid == grid):
+            return 'The Grid and the BitGrid are not equal.'
+        return None
+
+    def getErrors(self):
+        grid = self.getLayout(False).food
+        bitGrid = self.getLayout(True).food
+        if not isinstance(bitGrid, game.BitGrid):
+            return 'The layout loaded with bitboard keeps its food in a %s.' % type(bitGrid).__name__
+        error = self.compare(grid, bitGrid)
+        if error == None:
+            walls = self.getLayout(False).walls
+            error = self.compare(walls, game.BitGrid.fromGrid(walls))
+        # copyWith shares columns with the grid it copies, so the copies
+        # are made from grids that are never written to
+        copies = (grid.copy(), bitGrid.copy())
+        for x, y in grid.asList():
+            if error != None:
+                break
+            grid[x][y] = False
+            bitGrid[x][y] = False
+            copies = tuple([g.copyWith(x, y, False) for g in copies])
+            error = self.compare(grid, bitGrid) or self.compare(*copies)
+            if error != None:
+                error = 'After eating (%s, %s): %s' % (x, y, error)
+        return error
+
+    def execute(self, grades, moduleDict, solutionDict):
+        gold_packed = solutionDict['packed_food']
+        error = self.getErrors()
+        packed = str(self.getLayout(True).food.packBits())
+        if error == None and packed != gold_packed:
+            error = 'The packed food is %s, correct packed food %s.' % (packed, gold_packed)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tfood:\t\t\t%s' % self.getLayout(True).food.count())
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The packBits of the food Grid of the layout.\n')
+        handle.write('packed_food: "%s"\n' % str(self.getLayout(False).food.packBits()))
+        handle.close()
+        return True
+
+
+class StateHashTest(testClasses.TestCase):
+    """
+    Eats the capsules and then the food of the layout a cell at a time, both
+    on a successor that shares its data with its parent (GameStateData(prev)
+    followed by removeCapsule / removeFood, as the rules do) and on a
+    deepCopy, and checks after every cell that both agree on hash and
+    equality with a state built from the layout whose food and capsules
+    were eaten in place. The hash of the parent must not change, nor the
+    hash of a food grid that was hashed before being written through
+    grid[x][y]. The number of cells eaten must be eaten.
+    """
+
+    def __init__(self, question, testDict):
+        super(StateHashTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+
+    def getLayout(self):
+        return layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+
+    def getInitialState(self, lay):
+        state = pacman.GameState()
+        state.initialize(lay)
+        return state
+
+    def getErrors(self):
+        "Returns an error message or None, and the number of cells eaten"
+        lay = self.getLayout()
+        shared = plain = self.getInitialState(lay)
+        written = lay.food.copy()
+        eaten = []
+        for x, y in lay.capsules + lay.food.asList():
+            parent, parentHash = shared, hash(shared)
+            shared = pacman.GameState(shared)
+            plain = plain.deepCopy()
+            if (x, y) in lay.capsules:
+                shared.data.removeCapsule((x, y))
+                plain.data.removeCapsule((x, y))
+            else:
+                shared.data.removeFood((x, y))
+                plain.data.removeFood((x, y))
+            eaten.append((x, y))
+            # hashed before anything is written in place, which makes the
+            # grids compute their keys again instead of deriving them
+            hashes = [('successor', shared, hash(shared)), ('deepCopy', plain, hash(plain))]
+
+            error = None
+            writtenHash = hash(written)
+            if (x, y) not in lay.capsules:
+                written[x][y] = False
+                if hash(written) == writtenHash:
+                    error = 'the hash of the food grid did not change when it was written in place.'
+            fresh = self.getInitialState(lay)
+            for cell in eaten:
+                if cell in fresh.data.capsules:
+                    fresh.data.capsules.remove(cell)
+                else:
+                    fresh.data.food[cell[0]][cell[1]] = False
+            if error != None:
+                pass
+            elif hash(parent) != parentHash:
+                error = 'the hash of the parent changed from %s to %s.' % (parentHash, hash(parent))
+            elif hash(written) != hash(fresh.data.food):
+                error = 'the food grid written in place hashes to %s, the same food built again to %s.' % (hash(written), hash(fresh.data.food))
+            for name, state, stateHash in hashes:
+                if error != None:
+                    break
+                if stateHash != hash(fresh):
+                    error = 'the %s hashes to %s, the same state built again to %s.' % (name, stateHash, hash(fresh))
+                elif not (state == fresh and fresh == state):
+                    error = 'the %s is not equal to the same state built again.' % name
+            if error != None:
+                return 'After eating (%s, %s): %s' % (x, y, error), len(eaten)
+        return None, len(eaten)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        gold_eaten = int(solutionDict['eaten'])
+        error, eaten = self.getErrors()
+        if error == None and eaten != gold_eaten:
+            error = '%s cells were eaten, correct number %s.' % (eaten, gold_eaten)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tcells eaten:\t\t%s' % eaten)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        lay = self.getLayout()
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The number of capsules and food of the layout.\n')
+        handle.write('eaten: "%s"\n' % (len(lay.capsules) + lay.food.count()))
+        handle.close()
+        return True
+
+
+class ExploredStatesTest(testClasses.TestCase):
+    """
+    Starts a game on the layout with trackExplored set to limit and
+    generates every successor of Pacman down to depth moves. The game's
+    ExploredStates must count them all and keep the distinct states
+    involved, but no more than limit of them. GameState.getAndResetExplored
+    must then return those states and reset the tracker in place: it stays
+    game.explored, is empty, and the states of the game count into it again.
+    The successors generated and the states kept must be generated and kept.
+    """
+
+    def __init__(self, question, testDict):
+        super(ExploredStatesTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.limit = int(testDict['limit'])
+        self.depth = int(testDict['depth'])
+
+    def explore(self):
+        "Returns an error message or None, the successors generated and the states kept"
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        game = pacman.ClassicGameRules().newGame(lay, None, [], None, quiet=True, trackExplored=self.limit)
+        tracker = game.explored
+        states, involved, generated = [game.state], set(), 0
+        for _ in range(self.depth):
+            successors = []
+            for state in states:
+                for action in state.getLegalActions(0):
+                    successors.append(state.generateSuccessor(0, action))
+                    involved.update([state, successors[-1]])
+                    generated += 1
+            states = successors
+
+        kept = len(tracker.states)
+        if tracker.generated != generated:
+            return 'The tracker counted %s successors, %s were generated.' % (tracker.generated, generated), 0, 0
+        if kept != min(self.limit, len(involved)):
+            return 'The tracker kept %s of the %s states, limit %s.' % (kept, len(involved), self.limit), 0, 0
+        if pacman.EXPLORED is not tracker:
+            return 'pacman.EXPLORED is not the tracker of the last game.', 0, 0
+        if len(pacman.GameState.getAndResetExplored()) != kept:
+            return 'getAndResetExplored did not return the states the tracker kept.', 0, 0
+        if game.explored is not tracker or tracker.states or tracker.generated:
+            return 'getAndResetExplored did not reset game.explored in place.', 0, 0
+        states[0].generateSuccessor(0, states[0].getLegalActions(0)[0])
+        if tracker.generated != 1 or len(pacman.GameState.getAndResetExplored(states[0])) != min(2, self.limit):
+            return 'The states of the game do not count into the tracker once it is reset.', 0, 0
+        return None, generated, kept
+
+    def execute(self, grades, moduleDict, solutionDict):
+        gold = (int(solutionDict['generated']), int(solutionDict['kept']))
+        error, generated, kept = self.explore()
+        if error == None and (generated, kept) != gold:
+            error = '%s successors generated and %s states kept, correct %s and %s.' % ((generated, kept) + gold)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tstates kept:\t\t%s of %s generated' % (kept, generated))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        error, generated, kept = self.explore()
+        if error != None:
+            raise Exception(error)
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The successors generated and the states the tracker kept.\n')
+        handle.write('generated: "%s"\n' % generated)
+        handle.write('kept: "%s"\n' % kept)
+        handle.close()
+        return True
+
+
+class CopyOnWriteTest(testClasses.TestCase):
+    """
+    Generates every successor of the game down to depth moves, Pacman and
+    the ghosts in turn, so that the rules eat food and capsules, scare,
+    move and eat ghosts and change the score of successors that share
+    their data with their parents. After the successors of a state and all
+    of theirs have been generated, the state must be as it was: the same
+    food, capsules, score and agent states. The food, capsules and ghosts
+    eaten over all successors must be food_eaten, capsules_eaten and
+    ghosts_eaten.
+    """
+
+    def __init__(self, question, testDict):
+        super(CopyOnWriteTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.depth = int(testDict['depth'])
+
+    def describe(self, state):
+        "What the rules may change in a state, in values that do not share anything with it"
+        agents = [(agentState.configuration.getPosition(), agentState.configuration.getDirection(),
+                   agentState.scaredTimer, agentState.numCarrying) for agentState in state.data.agentStates]
+        return (state.getFood().asList(), list(state.getCapsules()), state.getScore(), agents, list(state.data._eaten))
+
+    def explore(self, state, agentIndex, depth, eaten):
+        "Returns an error message or None, counting what the successors ate in eaten"
+        if depth == 0 or state.isWin() or state.isLose():
+            return None
+        before = self.describe(state)
+        for action in state.getLegalActions(agentIndex):
+            successor = state.generateSuccessor(agentIndex, action)
+            eaten['food'] += successor.data._foodEaten is not None
+            eaten['capsules'] += successor.data._capsuleEaten is not None
+            eaten['ghosts'] += sum(successor.data._eaten[1:])
+            error = self.explore(successor, (agentIndex + 1) % state.getNumAgents(), depth - 1, eaten)
+            if error == None and self.describe(state) != before:
+                error = 'Agent %s moving %s changed its parent from\n%s\nto\n%s' % (agentIndex, action, before, self.describe(state))
+            if error != None:
+                return error
+        return None
+
+    def getErrors(self):
+        "Returns an error message or None, and the food, capsules and ghosts eaten"
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        state = pacman.GameState()
+        state.initialize(lay, lay.getNumGhosts())
+        eaten = {'food': 0, 'capsules': 0, 'ghosts': 0}
+        error = self.explore(state, 0, self.depth, eaten)
+        return error, (eaten['food'], eaten['capsules'], eaten['ghosts'])
+
+    def execute(self, grades, moduleDict, solutionDict):
+        gold = tuple([int(solutionDict[key]) for key in ['food_eaten', 'capsules_eaten', 'ghosts_eaten']])
+        error, eaten = self.getErrors()
+        if error == None and eaten != gold:
+            error = 'Food, capsules and ghosts eaten: %s, correct %s.' % (eaten, gold)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tfood, capsules and ghosts eaten:\t%s, %s, %s' % eaten)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        error, eaten = self.getErrors()
+        if error != None:
+            raise Exception(error)
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The food, capsules and ghosts eaten by all successors.\n')
+        for key, count in zip(['food_eaten', 'capsules_eaten', 'ghosts_eaten'], eaten):
+            handle.write('%s: "%s"\n' % (key, count))
+        handle.close()
+        return True
+
+
+class ReadOnlyObservationsTest(testClasses.TestCase):
+    """
+    Checks that the food and agent states of a readOnlyCopy of the initial
+    state raise on every kind of write, while their copies can be changed
+    and the state itself is left as it was. Then plays a game of
+    pacmanAgent against ghostAgents for each of seeds, with and without
+    readOnlyObservations: both games must have the same moves and the
+    same outcome, and the scores must be scores.
+    """
+
+    def __init__(self, question, testDict):
+        super(ReadOnlyObservationsTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.pacmanAgentName = testDict.get('pacmanAgent', 'GreedyAgent')
+        self.ghostAgentName = testDict.get('ghostAgent', 'DirectionalGhost')
+        self.seeds = [int(seed) for seed in testDict['seeds'].split()]
+
+    def getLayout(self):
+        return layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+
+    def getWriteErrors(self):
+        "Returns an error message, or None if every write through the views raised"
+        state = pacman.GameState()
+        state.initialize(self.getLayout())
+        before = state.deepCopy()
+        view = state.readOnlyCopy()
+        food, agentState = view.data.food, view.data.agentStates[0]
+        x, y = food.asList()[0]
+        writes = [('food[%s][%s] = False' % (x, y), lambda: food[x].__setitem__(y, False)),
+                  ('food[%s] = column' % x, lambda: food.__setitem__(x, [False] * food.height)),
+                  ('food.width = 1', lambda: setattr(food, 'width', 1)),
+                  ('agentState.scaredTimer = 1', lambda: setattr(agentState, 'scaredTimer', 1)),
+                  ('agentState.configuration = None', lambda: setattr(agentState, 'configuration', None))]
+        for name, write in writes:
+            try:
+                write()
+            except (TypeError, AttributeError):
+                continue
+            return 'Writing %s through a read-only view did not raise.' % name
+        foodCopy, agentStateCopy = food.copy(), agentState.copy()
+        foodCopy[x][y] = False
+        agentStateCopy.scaredTimer = 1
+        if foodCopy[x][y] or agentStateCopy.scaredTimer != 1:
+            return 'The copies of the read-only views cannot be changed.'
+        if not (state == before and view == before):
+            return 'Writing to the copies of the views changed the state.'
+        return None
+
+    def playGames(self, readOnlyObservations):
+        "Returns the move history, win and score of the game of each seed"
+        results = []
+        for seed in self.seeds:
+            random.seed(seed)
+            lay = self.getLayout()
+            pacmanAgent = getattr(pacman.pacmanAgents, self.pacmanAgentName)()
+            ghosts = [getattr(pacman.ghostAgents, self.ghostAgentName)(i + 1) for i in range(lay.getNumGhosts())]
+            game = pacman.ClassicGameRules().newGame(lay, pacmanAgent, ghosts, textDisplay.NullGraphics(), quiet=True,
+                                                     readOnlyObservations=readOnlyObservations)
+            game.muteAgents = True
+            game.run()
+            results.append((game.moveHistory, game.state.isWin(), game.state.getScore()))
+        return results
+
+    def getErrors(self):
+        "Returns an error message or None, and the scores of the games"
+        error = self.getWriteErrors()
+        if error != None:
+            return error, []
+        results, readOnlyResults = self.playGames(False), self.playGames(True)
+        for seed, result, readOnlyResult in zip(self.seeds, results, readOnlyResults):
+            if result != readOnlyResult:
+                return ('With seed %s the game with readOnlyObservations ended %s with score %s after %s moves, '
+                        'without %s with score %s after %s moves.' %
+                        (seed, ['lost', 'won'][readOnlyResult[1]], readOnlyResult[2], len(readOnlyResult[0]),
+                         ['lost', 'won'][result[1]], result[2], len(result[0]))), []
+        return None, [score for moves, win, score in results]
+
+    def execute(self, grades, moduleDict, solutionDict):
+        gold_scores = solutionDict['scores']
+        error, scores = self.getErrors()
+        if error == None and ' '.join([str(score) for score in scores]) != gold_scores:
+            error = 'The scores are %s, correct scores %s.' % (' '.join([str(score) for score in scores]), gold_scores)
+        if error != None:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s' % error)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tscores:\t\t\t%s' % ' '.join([str(score) for score in scores]))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        error, scores = self.getErrors()
+        if error != None:
+            raise Exception(error)
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The scores of the games of the seeds.\n')
+        handle.write('scores: "%s"\n' % ' '.join([str(score) for score in scores]))
+        handle.close()
+        return True
+
+
 from game import Actions
 def getStatesFromPath(start, path):
     "Returns the list of states visited along the path"
@@ -680,6 +1582,55 @@ class ClosestDotTest(testClasses.TestCase):
         return True
 
 
+class IncrementalClosestDotTest(testClasses.TestCase):
+    """
+    Plans the whole game with the IncrementalClosestDotSearchAgent and with
+    the ClosestDotSearchAgent and checks that both paths cost the same,
+    solution_cost. The incremental agent plans the game twice, since its
+    planner has to start afresh for every game.
+    """
+
+    def __init__(self, question, testDict):
+        super(IncrementalClosestDotTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+
+    def getCost(self, agent):
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        agent.registerInitialState(gameState)
+        return len(agent.actions)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        searchAgents = moduleDict['searchAgents']
+        gold_cost = int(solutionDict['solution_cost'])
+        cost = self.getCost(searchAgents.ClosestDotSearchAgent())
+        agent = searchAgents.IncrementalClosestDotSearchAgent()
+        costs = [self.getCost(agent), self.getCost(agent)]
+
+        if cost != gold_cost or costs != [gold_cost, gold_cost]:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tClosestDotSearchAgent path cost:\t\t\t%s' % cost)
+            grades.addMessage('\tIncrementalClosestDotSearchAgent path costs:\t%s, %s' % tuple(costs))
+            grades.addMessage('\tcorrect path cost:\t\t\t\t%s' % gold_cost)
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tpath cost:\t\t%s' % cost)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The cost of the path of the ClosestDotSearchAgent.\n')
+        handle.write('solution_cost: "%s"\n' % self.getCost(searchAgents.ClosestDotSearchAgent()))
+        handle.close()
+        return True
+
+
 
 
 class CornerHeuristicSanity(testClasses.TestCase):
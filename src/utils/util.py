@@ -29,6 +29,7 @@
 import sys
 import inspect
 import heapq, random
+from collections import deque
 
 
 class FixedRandom:
@@ -147,26 +148,36 @@ class Stack:
         "Returns true if the stack is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class Queue:
     "A container with a first-in-first-out (FIFO) queuing policy."
     def __init__(self):
-        self.list = []
+        self.list = deque()
 
     def push(self,item):
         "Enqueue the 'item' into the queue"
-        self.list.insert(0,item)
+        self.list.append(item)
+
+    def pushMany(self, items):
+        "Enqueue every item of an iterable, in order"
+        self.list.extend(items)
 
     def pop(self):
         """
           Dequeue the earliest enqueued item still in the queue. This
           operation removes the item from the queue.
         """
-        return self.list.pop()
+        return self.list.popleft()
 
     def isEmpty(self):
         "Returns true if the queue is empty"
         return len(self.list) == 0
 
+    def __len__(self):
+        return len(self.list)
+
 class PriorityQueue:
     """
       Implements a priority queue data structure. Each inserted item
@@ -193,6 +204,9 @@ class PriorityQueue:
     def isEmpty(self):
         return len(self.heap) == 0
 
+    def __len__(self):
+        return len(self.heap)
+
     def update(self, item, priority):
         # If item already in priority queue with higher priority, update its priority and rebuild the heap.
         # If item already in priority queue with equal or lower priority, do nothing.
@@ -208,6 +222,258 @@ class PriorityQueue:
         else:
             self.push(item, priority)
 
+class IndexedPriorityQueue:
+    """
+      Implements a priority queue that holds at most one entry per item.
+      A position map from each item to its heap slot gives O(log n) push,
+      pop and decreaseKey and an O(1) membership test, so a search can lower
+      the priority of a queued state instead of pushing a duplicate and the
+      queue never grows beyond the number of distinct states. Items must be
+      hashable. Ties are broken by insertion order, and an item whose
+      priority is lowered counts as inserted at that time.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.position = {}
+        self.count = 0
+
+    def getMinimumPriority(self):
+        return self.heap[0][0]
+
+    def getPriority(self, item):
+        return self.heap[self.position[item]][0]
+
+    def push(self, item, priority):
+        "Adds an item that is not in the queue yet"
+        if item in self.position:
+            raise KeyError('%s is already in the queue' % str(item))
+        self.heap.append((priority, self.count, item))
+        self.count += 1
+        self.position[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def pop(self):
+        (_, _, item) = self.heap[0]
+        last = self.heap.pop()
+        del self.position[item]
+        if self.heap:
+            self.heap[0] = last
+            self.position[last[2]] = 0
+            self._siftDown(0)
+        return item
+
+    def decreaseKey(self, item, priority):
+        "Lowers the priority of an item already in the queue"
+        index = self.position[item]
+        if self.heap[index][0] < priority:
+            raise ValueError('cannot raise the priority of %s' % str(item))
+        if self.heap[index][0] == priority:
+            return
+        self.heap[index] = (priority, self.count, item)
+        self.count += 1
+        self._siftUp(index)
+
+    def remove(self, item):
+        "Takes an item out of the queue wherever it is"
+        index = self.position.pop(item)
+        last = self.heap.pop()
+        if index < len(self.heap):
+            self.heap[index] = last
+            self.position[last[2]] = index
+            self._siftUp(index)
+            self._siftDown(self.position[last[2]])
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update, without the linear scan.
+        if item not in self.position:
+            self.push(item, priority)
+        elif priority < self.getPriority(item):
+            self.decreaseKey(item, priority)
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def getItems(self):
+        "Returns the queued items in no particular order"
+        return list(self.position)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def __len__(self):
+        return len(self.heap)
+
+    def _siftUp(self, index):
+        heap, position = self.heap, self.position
+        entry = heap[index]
+        while index > 0:
+            parent = (index - 1) >> 1
+            if heap[parent][:2] <= entry[:2]:
+                break
+            heap[index] = heap[parent]
+            position[heap[index][2]] = index
+            index = parent
+        heap[index] = entry
+        position[entry[2]] = index
+
+    def _siftDown(self, index):
+        heap, position = self.heap, self.position
+        size = len(heap)
+        entry = heap[index]
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1][:2] < heap[child][:2]:
+                child += 1
+            if entry[:2] <= heap[child][:2]:
+                break
+            heap[index] = heap[child]
+            position[heap[index][2]] = index
+            index = child
+        heap[index] = entry
+        position[entry[2]] = index
+
+class BucketPriorityQueue:
+    """
+      A priority queue with the interface of IndexedPriorityQueue for the
+      small integer priorities of unit-cost searches (Dial's algorithm).
+      Items are kept in one FIFO bucket per priority and pops scan upwards
+      from the lowest non-empty bucket, so there are no log factors and no
+      tuple comparisons. Ties leave in insertion order, and an item whose
+      priority is lowered counts as inserted at that time, exactly as in
+      IndexedPriorityQueue. Lowered or removed items leave a stale entry in
+      their old bucket that is skipped when it is reached.
+
+      The first time a priority is not a whole number, or lies more than
+      MAX_SPAN away from the lowest one, the queue moves its items into an
+      IndexedPriorityQueue and uses that from then on.
+    """
+    MAX_SPAN = 4096
+
+    def  __init__(self):
+        self.buckets = {} # priority -> deque of (count, item)
+        self.entries = {} # item -> (priority, count) of its live entry
+        self.count = 0
+        self.minimum = 0 # no live entry has a lower priority
+        self.heap = None
+
+    def getMinimumPriority(self):
+        if self.heap is not None: return self.heap.getMinimumPriority()
+        bucket = self._advance()
+        return self.entries[bucket[0][1]][0]
+
+    def getPriority(self, item):
+        if self.heap is not None: return self.heap.getPriority(item)
+        return self.entries[item][0]
+
+    def push(self, item, priority):
+        "Adds an item that is not in the queue yet"
+        if self.heap is not None: return self.heap.push(item, priority)
+        if item in self.entries:
+            raise KeyError('%s is already in the queue' % str(item))
+        bucket = self._bucketOf(priority)
+        if bucket is None:
+            self._fallBack()
+            return self.heap.push(item, priority)
+        if not self.entries:
+            self.minimum = bucket
+        self._insert(item, priority, bucket)
+
+    def pop(self):
+        if self.heap is not None: return self.heap.pop()
+        count, item = self._advance().popleft()
+        del self.entries[item]
+        return item
+
+    def decreaseKey(self, item, priority):
+        "Lowers the priority of an item already in the queue"
+        if self.heap is not None: return self.heap.decreaseKey(item, priority)
+        if self.entries[item][0] < priority:
+            raise ValueError('cannot raise the priority of %s' % str(item))
+        if self.entries[item][0] == priority:
+            return
+        bucket = self._bucketOf(priority)
+        if bucket is None:
+            self._fallBack()
+            return self.heap.decreaseKey(item, priority)
+        self._insert(item, priority, bucket)
+
+    def remove(self, item):
+        "Takes an item out of the queue wherever it is"
+        if self.heap is not None: return self.heap.remove(item)
+        del self.entries[item]
+
+    def update(self, item, priority):
+        # Same contract as PriorityQueue.update
+        if item not in self:
+            self.push(item, priority)
+        elif priority < self.getPriority(item):
+            self.decreaseKey(item, priority)
+
+    def isEmpty(self):
+        return len(self) == 0
+
+    def getItems(self):
+        "Returns the queued items in no particular order"
+        if self.heap is not None: return self.heap.getItems()
+        return list(self.entries)
+
+    def __contains__(self, item):
+        if self.heap is not None: return item in self.heap
+        return item in self.entries
+
+    def __len__(self):
+        if self.heap is not None: return len(self.heap)
+        return len(self.entries)
+
+    def _bucketOf(self, priority):
+        "Returns the bucket of a priority, None if it does not fit in a bucket"
+        try:
+            bucket = int(priority)
+        except (OverflowError, ValueError):
+            return None
+        if bucket != priority:
+            return None
+        if self.entries and abs(bucket - self.minimum) > self.MAX_SPAN:
+            return None
+        return bucket
+
+    def _insert(self, item, priority, bucket):
+        self.entries[item] = (priority, self.count)
+        if bucket not in self.buckets:
+            self.buckets[bucket] = deque()
+        self.buckets[bucket].append((self.count, item))
+        self.count += 1
+        if bucket < self.minimum:
+            self.minimum = bucket
+
+    def _advance(self):
+        "Returns the lowest bucket, with a live entry at its front"
+        buckets, entries = self.buckets, self.entries
+        if not entries:
+            raise IndexError('the priority queue is empty')
+        while True:
+            bucket = buckets.get(self.minimum)
+            if bucket:
+                count, item = bucket[0]
+                entry = entries.get(item)
+                if entry is not None and entry[1] == count:
+                    return bucket
+                bucket.popleft()
+            else:
+                if bucket is not None:
+                    del buckets[self.minimum]
+                self.minimum += 1
+
+    def _fallBack(self):
+        heap = IndexedPriorityQueue()
+        # pushing in (priority, count) order keeps the order of ties
+        for item, (priority, count) in sorted(self.entries.items(), key=lambda entry: entry[1]):
+            heap.push(item, priority)
+        self.heap = heap
+        self.buckets, self.entries = {}, {}
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the
@@ -224,6 +490,69 @@ class PriorityQueueWithFunction(PriorityQueue):
         "Adds an item to the queue with priority from the priority function"
         PriorityQueue.push(self, item, self.priorityFunction(item))
 
+class NodeTable:
+    """
+    A parent-pointer store for search nodes. Every generated node is recorded
+    once as (state, parent id, action, path cost) and referred to by its
+    integer id, so a frontier only holds ids and pushing a child is O(1)
+    instead of copying the whole path. The list of actions is rebuilt with
+    getPath once, when the goal has been found.
+
+    With reverse=True, getPath returns the actions from the node back to the
+    root, which is what a backward search needs.
+    """
+    ROOT = -1
+
+    def __init__(self, reverse=False):
+        self.reverse = reverse
+        self.states = []
+        self.parents = []
+        self.actions = []
+        self.costs = []
+
+    def add(self, state, parent=ROOT, action=None, cost=0):
+        "Records a node and returns its id"
+        self.states.append(state)
+        self.parents.append(parent)
+        self.actions.append(action)
+        self.costs.append(cost)
+        return len(self.states) - 1
+
+    def getState(self, node):
+        return self.states[node]
+
+    def getParent(self, node):
+        return self.parents[node]
+
+    def getAction(self, node):
+        return self.actions[node]
+
+    def getCost(self, node):
+        return self.costs[node]
+
+    def getPath(self, node):
+        "Returns the actions leading from the root to the node"
+        path = []
+        while self.parents[node] != NodeTable.ROOT:
+            path.append(self.actions[node])
+            node = self.parents[node]
+        if not self.reverse:
+            path.reverse()
+        return path
+
+    def __len__(self):
+        return len(self.states)
+
+class ClosedSet(set):
+    """
+    The closed list of a search, a plain set of the states expanded. It is
+    a class of its own only so that search.collectStatistics can measure
+    the closed lists of a search, as it does its queues.
+    """
+
+class ClosedTable(dict):
+    "A closed list that keeps a value, e.g. a path cost, for every state; see ClosedSet"
+
 
 def manhattanDistance( xy1, xy2 ):
     "Returns the Manhattan distance between points xy1 and xy2"